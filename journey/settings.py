@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
+    "station.profiling.QueryProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -93,6 +94,137 @@ DATABASES = {
     }
 }
 
+# "off" opens a connection per request, "persistent" keeps it open for
+# DB_CONN_MAX_AGE seconds per thread and "pool" shares a psycopg_pool
+# between threads, which suits the ASGI server. Connections are checked
+# before reuse in both modes
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "off")
+if DB_POOL_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DB_CONN_MAX_AGE", 60)
+    )
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_POOL_MODE == "pool":
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            # Seconds a request waits for a free connection
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+
+if os.environ.get("SQLITE_DB_PATH"):
+    # Lightweight local runs, e.g. benchmarks without a Postgres server
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["SQLITE_DB_PATH"],
+    }
+
+# Read replicas of the default database, as comma separated hosts, or
+# database files for SQLite. Catalog reads are routed to them by
+# station.db_router.ReplicaRouter
+if os.environ.get("SQLITE_DB_PATH"):
+    replica_variable, replica_setting = "SQLITE_REPLICA_PATHS", "NAME"
+else:
+    replica_variable, replica_setting = "POSTGRES_REPLICA_HOSTS", "HOST"
+
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.environ.get(replica_variable, "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        replica_setting: replica.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["station.db_router.ReplicaRouter"]
+
+# Seconds a user reads from the primary after placing an order
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Train list pages, an LRU per process unless TRAIN_LIST_CACHE_URL
+    # points at a Redis-compatible server shared by all of them
+    "train_list": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "train-list",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(
+                os.environ.get("TRAIN_LIST_CACHE_MAX_ENTRIES", 1000)
+            ),
+        },
+    },
+}
+
+if os.environ.get("TRAIN_LIST_CACHE_URL"):
+    CACHES["train_list"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["TRAIN_LIST_CACHE_URL"],
+    }
+
+TRAIN_LIST_CACHE_TIMEOUT = int(
+    os.environ.get("TRAIN_LIST_CACHE_TIMEOUT", 300)
+)
+
+# Orders retried after unique violations or deadlocks, with jittered
+# exponential backoff starting at BOOKING_RETRY_BACKOFF seconds
+BOOKING_RETRY_ATTEMPTS = int(os.environ.get("BOOKING_RETRY_ATTEMPTS", 3))
+BOOKING_RETRY_BACKOFF = float(os.environ.get("BOOKING_RETRY_BACKOFF", 0.05))
+
+JOURNEY_SEARCH_CACHE_TIMEOUT = int(
+    os.environ.get("JOURNEY_SEARCH_CACHE_TIMEOUT", 30)
+)
+
+# List endpoints render values_list() rows instead of model instances
+FAST_LIST_SERIALIZERS = (
+    os.environ.get("FAST_LIST_SERIALIZERS", "true").lower() == "true"
+)
+
+CONNECTION_MIN_TRANSFER_MINUTES = int(
+    os.environ.get("CONNECTION_MIN_TRANSFER_MINUTES", 10)
+)
+
+# Days ahead the journeys of schedules are created by extend_schedules,
+# and the furthest a search may create them lazily
+JOURNEY_SCHEDULE_HORIZON_DAYS = int(
+    os.environ.get("JOURNEY_SCHEDULE_HORIZON_DAYS", 30)
+)
+JOURNEY_SCHEDULE_MAX_DAYS = int(
+    os.environ.get("JOURNEY_SCHEDULE_MAX_DAYS", 366)
+)
+
+# Share of requests whose queries are profiled, from 0 (middleware off)
+# to 1. Profiled requests slower than QUERY_PROFILER_SLOW_MS are logged
+# to station.slow_requests with their costliest queries
+QUERY_PROFILER_SAMPLE_RATE = float(
+    os.environ.get("QUERY_PROFILER_SAMPLE_RATE", 0)
+)
+QUERY_PROFILER_SLOW_MS = float(os.environ.get("QUERY_PROFILER_SLOW_MS", 500))
+QUERY_PROFILER_TOP_QUERIES = int(
+    os.environ.get("QUERY_PROFILER_TOP_QUERIES", 5)
+)
+
+# "local" fans seat events out within one process, "postgres" uses
+# LISTEN/NOTIFY so every worker receives them
+SEAT_EVENTS_BACKEND = os.environ.get("SEAT_EVENTS_BACKEND", "local")
+SEAT_EVENTS_HEARTBEAT = int(os.environ.get("SEAT_EVENTS_HEARTBEAT", 15))
+
+# /metrics is served to staff sessions, to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>" and to the comma-separated
+# client addresses of METRICS_ALLOWED_IPS
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = list(
+    filter(None, os.environ.get("METRICS_ALLOWED_IPS", "").split(","))
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -146,9 +278,19 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson when installed, the stdlib json otherwise
+    "DEFAULT_RENDERER_CLASSES": [
+        "station.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "station.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "station.throttling.AnonRateThrottle",
+        "station.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "10/minute",
@@ -172,6 +314,15 @@ SPECTACULAR_SETTINGS = {
 MEDIA_ROOT = "/files/media"
 MEDIA_URL = "/media/"
 
+# Bounding boxes of the resized train images served next to the originals
+TRAIN_IMAGE_SIZES = {"thumbnail": (320, 320), "medium": (1024, 1024)}
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", 80))
+# cpu_count() is None where the count cannot be determined
+IMAGE_WORKERS = int(
+    os.environ.get("IMAGE_WORKERS", min(4, os.cpu_count() or 1))
+)
+IMAGE_CACHE_SECONDS = 365 * 24 * 60 * 60
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
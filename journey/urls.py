@@ -29,9 +29,12 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from station.metrics import metrics_view
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/station/", include("station.urls", namespace="journey")),
     path("api/user/", include("user.urls", namespace="user")),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -7,6 +7,7 @@ from station.models import (
     Train,
     Order,
     Journey,
+    JourneySchedule,
     Ticket,
 )
 
@@ -46,6 +47,11 @@ class JourneyAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(JourneySchedule)
+class JourneyScheduleAdmin(admin.ModelAdmin):
+    pass
+
+
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
     pass
@@ -0,0 +1,254 @@
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions, status
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from station.events import get_broker
+from station.models import Journey, Station
+from station.renderers import ORJSONRenderer
+from station.serializers import (
+    JourneyAvailabilitySerializer,
+    JourneyListSerializer,
+    JourneyRetrieveSerializer,
+    StationSerializer,
+)
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    """JSON response rendered the same way as the DRF viewsets"""
+    return HttpResponse(
+        ORJSONRenderer().render(data),
+        content_type="application/json",
+        status=status_code,
+        headers=headers,
+    )
+
+
+def error_response(exc):
+    data = exc.detail
+    if not isinstance(data, (list, dict)):
+        data = {"detail": data}
+
+    headers = None
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        authenticate_header = JWTAuthentication().authenticate_header(None)
+        headers = {"WWW-Authenticate": authenticate_header}
+    elif getattr(exc, "wait", None):
+        headers = {"Retry-After": "%d" % exc.wait}
+
+    return render(data, exc.status_code, headers)
+
+
+async def authenticate(request):
+    """Async counterpart of JWTAuthentication.authenticate"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = authentication.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(
+            "Token contained no recognizable user identification"
+        )
+
+    try:
+        user = await get_user_model().objects.aget(
+            **{api_settings.USER_ID_FIELD: user_id}
+        )
+    except get_user_model().DoesNotExist:
+        raise exceptions.AuthenticationFailed("User not found")
+
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed("User is inactive")
+
+    return user
+
+
+async def check_throttles(request):
+    """Async counterpart of APIView.check_throttles.
+
+    Applies DEFAULT_THROTTLE_CLASSES, whose histories are shared with
+    the DRF viewsets, so a user has one budget for both.
+    """
+    drf_request = Request(request)
+    drf_request.user = request.user
+    durations = []
+    for throttle_class in drf_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        # Throttle histories are kept in the cache
+        if not await sync_to_async(throttle.allow_request)(drf_request, None):
+            durations.append(throttle.wait())
+
+    if durations:
+        durations = [duration for duration in durations if duration]
+        raise exceptions.Throttled(max(durations, default=None))
+
+
+def authenticated_read(view):
+    """Async GET view open to any authenticated user.
+
+    Mirrors IsAdminOrIfAuthenticatedReadOnly for safe methods and the
+    configured throttles. The async endpoints are read-only, so writes
+    stay on the DRF viewsets.
+    """
+
+    @require_safe
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.user = await authenticate(request)
+            if request.user is None:
+                raise exceptions.NotAuthenticated()
+            await check_throttles(request)
+
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+
+    return wrapper
+
+
+async def paginate(request, queryset, serializer_class):
+    """Limit/offset page of a queryset, fetched with the async ORM"""
+    drf_request = Request(request)
+    paginator = LimitOffsetPagination()
+    paginator.request = drf_request
+    paginator.limit = paginator.get_limit(drf_request)
+    paginator.offset = paginator.get_offset(drf_request)
+    paginator.count = await queryset.acount()
+
+    page = queryset[paginator.offset:paginator.offset + paginator.limit]
+    objects = [obj async for obj in page.aiterator()]
+    data = serializer_class(objects, many=True).data
+
+    return paginator.get_paginated_response(data).data
+
+
+async def get_object(queryset, pk):
+    try:
+        return await queryset.aget(pk=pk)
+    except queryset.model.DoesNotExist:
+        raise exceptions.NotFound(
+            f"No {queryset.model._meta.object_name} matches the given query."
+        )
+
+
+@authenticated_read
+async def journey_list(request):
+    """Async endpoint for the journey list"""
+    queryset = (
+        Journey.objects.select_related("train__train_type", "route")
+        .defer("seat_map")
+        .order_by("id")
+    )
+
+    return render(await paginate(request, queryset, JourneyListSerializer))
+
+
+@authenticated_read
+async def journey_detail(request, pk):
+    """Async endpoint for a single journey with its taken seats"""
+    journey = await get_object(
+        Journey.objects.select_related(
+            "route__source", "route__destination", "train__train_type"
+        ).prefetch_related("train__crew"),
+        pk,
+    )
+
+    return render(
+        JourneyRetrieveSerializer(journey, context={"request": request}).data
+    )
+
+
+async def get_availability(pk):
+    journey = await get_object(
+        Journey.objects.select_related("train").only(
+            "id",
+            "seat_map",
+            "tickets_sold",
+            "train__id",
+            "train__cargo_num",
+            "train__seats",
+        ),
+        pk,
+    )
+
+    return JourneyAvailabilitySerializer(journey).data
+
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def seat_event_stream(subscription, availability):
+    """Snapshot of the seats followed by every change, as SSE messages"""
+    try:
+        yield sse_message("snapshot", availability)
+        while True:
+            try:
+                event = await subscription.get(settings.SEAT_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event["type"] == "reset":
+                try:
+                    availability = await get_availability(event["journey"])
+                except exceptions.NotFound:
+                    return
+                yield sse_message("snapshot", availability)
+            else:
+                yield sse_message("seats", event)
+    finally:
+        subscription.close()
+
+
+@authenticated_read
+async def journey_availability(request, pk):
+    """Async endpoint for polling the free seats of a journey"""
+    return render(await get_availability(pk))
+
+
+@authenticated_read
+async def journey_seat_events(request, pk):
+    """Async endpoint streaming seat changes of a journey as SSE"""
+    # Subscribe first, so no change is lost between snapshot and stream
+    subscription = get_broker().subscribe(pk)
+    try:
+        availability = await get_availability(pk)
+    except exceptions.NotFound:
+        subscription.close()
+        raise
+
+    return StreamingHttpResponse(
+        seat_event_stream(subscription, availability),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@authenticated_read
+async def station_list(request):
+    """Async endpoint for the station list"""
+    queryset = Station.objects.order_by("id")
+
+    return render(await paginate(request, queryset, StationSerializer))
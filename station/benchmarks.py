@@ -0,0 +1,432 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from station.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from station.urls import router
+
+SCALES = {
+    "tiny": {
+        "stations": 5,
+        "routes": 8,
+        "trains": 3,
+        "journeys": 20,
+        "orders": 10,
+        "tickets": 40,
+    },
+    "small": {
+        "stations": 50,
+        "routes": 200,
+        "trains": 20,
+        "journeys": 2000,
+        "orders": 500,
+        "tickets": 5000,
+    },
+    "medium": {
+        "stations": 200,
+        "routes": 1000,
+        "trains": 100,
+        "journeys": 20000,
+        "orders": 5000,
+        "tickets": 50000,
+    },
+    "large": {
+        "stations": 1000,
+        "routes": 5000,
+        "trains": 500,
+        "journeys": 200000,
+        "orders": 50000,
+        "tickets": 500000,
+    },
+}
+
+TRAIN_CARGO_NUM = 10
+TRAIN_SEATS = 50
+BATCH_SIZE = 2000
+
+# Actions that are not safe to replay with generated data
+SKIPPED_ACTIONS = {"upload_image"}
+
+
+def seed(
+    user, stations, routes, trains, journeys, orders, tickets, random_seed=0
+):
+    """Bulk-create a deterministic dataset of the given size"""
+    generator = random.Random(random_seed)
+    start = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    station_objs = Station.objects.bulk_create(
+        [
+            Station(
+                name=f"Station {number}",
+                latitude=generator.uniform(44, 52),
+                longitude=generator.uniform(22, 40),
+            )
+            for number in range(stations)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    route_objs = Route.objects.bulk_create(
+        [
+            Route(
+                source=source,
+                destination=destination,
+                distance=generator.randint(50, 1200),
+            )
+            for source, destination in (
+                generator.sample(station_objs, 2) for _ in range(routes)
+            )
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    train_type = TrainType.objects.create(name="Intercity")
+    crew = Crew.objects.create(first_name="Benchmark", last_name="Crew")
+    train_objs = Train.objects.bulk_create(
+        [
+            Train(
+                name=f"Train {number}",
+                cargo_num=TRAIN_CARGO_NUM,
+                place_in_cargo=TRAIN_SEATS,
+                seats=TRAIN_SEATS,
+                train_type=train_type,
+            )
+            for number in range(trains)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Train.crew.through.objects.bulk_create(
+        [
+            Train.crew.through(train_id=train.id, crew_id=crew.id)
+            for train in train_objs
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    places = [[] for _ in range(journeys)]
+    capacity = TRAIN_CARGO_NUM * TRAIN_SEATS
+    tickets = min(tickets, journeys * capacity)
+    for number in range(tickets):
+        place = number // journeys
+        places[number % journeys].append(
+            (place // TRAIN_SEATS + 1, place % TRAIN_SEATS + 1)
+        )
+
+    journey_objs = []
+    for number in range(journeys):
+        departure_time = start + timedelta(
+            minutes=generator.randint(0, 30 * 24 * 60)
+        )
+        journey = Journey(
+            route=generator.choice(route_objs),
+            train=generator.choice(train_objs),
+            departure_time=departure_time,
+            arrival_time=departure_time
+            + timedelta(minutes=generator.randint(30, 900)),
+            tickets_sold=len(places[number]),
+        )
+        journey.mark_places(places[number])
+        journey_objs.append(journey)
+    journey_objs = Journey.objects.bulk_create(
+        journey_objs, batch_size=BATCH_SIZE
+    )
+
+    order_objs = Order.objects.bulk_create(
+        [Order(user=user) for _ in range(orders)], batch_size=BATCH_SIZE
+    )
+    Ticket.objects.bulk_create(
+        (
+            Ticket(
+                journey=journey,
+                cargo=cargo,
+                seat=seat,
+                order=order_objs[number % len(order_objs)],
+            )
+            for journey, journey_places in zip(journey_objs, places)
+            for number, (cargo, seat) in enumerate(journey_places)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    return {
+        "stations": station_objs,
+        "routes": route_objs,
+        "trains": train_objs,
+        "journeys": journey_objs,
+    }
+
+
+def endpoint_cases(data):
+    """(name, method, url name, params, args) for every router action"""
+    route = data["routes"][0]
+    first_departure = min(
+        journey.departure_time for journey in data["journeys"]
+    )
+    action_params = {
+        "search": {
+            "source": route.source_id,
+            "date_from": first_departure.date().isoformat(),
+            "date_to": (first_departure + timedelta(days=7))
+            .date()
+            .isoformat(),
+        },
+        "connections": {
+            "source": route.source_id,
+            "destination": data["routes"][-1].destination_id,
+            "departure": first_departure.isoformat(),
+        },
+        "nearby": {
+            "latitude": data["stations"][0].latitude,
+            "longitude": data["stations"][0].longitude,
+        },
+    }
+
+    cases = []
+    for _, viewset, basename in router.registry:
+        model = viewset.queryset.model
+        cases.append((f"{basename}-list", "get", f"{basename}-list", {}, None))
+
+        sample = model.objects.order_by("pk").first()
+        if sample is not None:
+            cases.append(
+                (
+                    f"{basename}-detail",
+                    "get",
+                    f"{basename}-detail",
+                    {},
+                    [sample.pk],
+                )
+            )
+
+        for extra_action in viewset.get_extra_actions():
+            if extra_action.__name__ in SKIPPED_ACTIONS:
+                continue
+            name = f"{basename}-{extra_action.url_name}"
+            args = None
+            if extra_action.detail:
+                if sample is None:
+                    continue
+                args = [sample.pk]
+            cases.append(
+                (
+                    name,
+                    "get",
+                    name,
+                    action_params.get(extra_action.__name__, {}),
+                    args,
+                )
+            )
+
+    return cases
+
+
+def order_payloads(journey):
+    """Single-ticket order payloads for the free seats of a journey"""
+    taken = set(journey.taken_places)
+    for cargo in range(1, journey.train.cargo_num + 1):
+        for seat in range(1, journey.train.seats + 1):
+            if (cargo, seat) not in taken:
+                yield {
+                    "tickets": [
+                        {"cargo": cargo, "seat": seat, "journey": journey.id}
+                    ]
+                }
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(request, iterations):
+    timings = []
+    queries = []
+    sizes = []
+    statuses = set()
+
+    for store in caches.all():
+        store.clear()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            # Streamed responses only query while they are consumed
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        sizes.append(len(content))
+        statuses.add(response.status_code)
+
+    return {
+        "status": sorted(statuses),
+        "queries": max(queries),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "bytes": max(sizes),
+    }
+
+
+@contextmanager
+def benchmark_session():
+    """(staff user, authenticated client) in a rolled back transaction.
+
+    Every cache is swapped for a private in-process one, so clearing
+    them between endpoints never touches caches shared with the running
+    API, e.g. a Redis train list cache.
+    """
+    allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+    local_caches = {
+        alias: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"benchmark-{alias}",
+        }
+        for alias in settings.CACHES
+    }
+    with transaction.atomic(), mock.patch.object(
+        APIView, "throttle_classes", ()
+    ), override_settings(ALLOWED_HOSTS=allowed_hosts, CACHES=local_caches):
+        user = get_user_model().objects.create_user(
+            f"benchmark-{time.time_ns()}@example.com",
+            "benchmark",
+            is_staff=True,
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        yield user, client
+
+        transaction.set_rollback(True)
+
+
+def run_benchmarks(scale, iterations=20, random_seed=0):
+    """Seed, measure every endpoint and roll everything back"""
+    report = {
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "django": django.get_version(),
+        "iterations": iterations,
+        "scale": scale,
+        "results": [],
+    }
+
+    with benchmark_session() as (user, client):
+        data = seed(user, random_seed=random_seed, **scale)
+
+        for name, method, url_name, params, args in endpoint_cases(data):
+            path = reverse(f"journey:{url_name}", args=args)
+            result = measure(
+                lambda: getattr(client, method)(path, params), iterations
+            )
+            result.update({"endpoint": name, "method": method.upper()})
+            report["results"].append(result)
+
+        payloads = order_payloads(data["journeys"][0])
+        path = reverse("journey:order-list")
+        result = measure(
+            lambda: client.post(path, next(payloads), format="json"),
+            iterations,
+        )
+        result.update({"endpoint": "order-create", "method": "POST"})
+        report["results"].append(result)
+
+    return report
+
+
+def run_list_benchmarks(rows=1000, iterations=20, random_seed=0):
+    """Times list pages of ``rows`` with and without the row encoders"""
+    report = {
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "rows": rows,
+        "results": [],
+    }
+
+    with benchmark_session() as (user, client):
+        seed(
+            user,
+            random_seed=random_seed,
+            **dict(SCALES["tiny"], trains=rows, journeys=rows),
+        )
+
+        for endpoint in ("journey-list", "train-list"):
+            path = reverse(f"journey:{endpoint}")
+            results = {}
+            for fast in (False, True):
+                # Every iteration renders the page instead of reading
+                # it from the train list cache
+                with override_settings(
+                    FAST_LIST_SERIALIZERS=fast, TRAIN_LIST_CACHE_TIMEOUT=0
+                ):
+                    results[fast] = measure(
+                        lambda: client.get(path, {"limit": rows}), iterations
+                    )
+            report["results"].append(
+                {
+                    "endpoint": endpoint,
+                    "serializer": results[False],
+                    "encoder": results[True],
+                    "speedup": round(
+                        results[False]["p50_ms"] / results[True]["p50_ms"], 2
+                    ),
+                }
+            )
+
+    return report
+
+
+def compare_reports(previous, current):
+    """Rows of (endpoint, metric, previous, current, change %)"""
+    previous_results = {
+        result["endpoint"]: result for result in previous["results"]
+    }
+    rows = []
+    for result in current["results"]:
+        old = previous_results.get(result["endpoint"])
+        if old is None:
+            continue
+        for metric in ("queries", "p50_ms", "p99_ms", "bytes"):
+            change = (
+                (result[metric] - old[metric]) / old[metric] * 100
+                if old[metric]
+                else 0.0
+            )
+            rows.append(
+                (
+                    result["endpoint"],
+                    metric,
+                    old[metric],
+                    result[metric],
+                    round(change, 1),
+                )
+            )
+
+    return rows
@@ -0,0 +1,141 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from rest_framework.exceptions import ValidationError
+
+from station.cache import bump_version_on_commit
+from station.events import publish_on_commit, seat_event
+from station.exceptions import BookingUnavailable, SeatConflict
+from station.models import Journey, Order, Ticket
+
+UNIQUE_VIOLATION = "23505"
+# Unique violation, serialization failure and deadlock
+RETRYABLE_SQLSTATES = {UNIQUE_VIOLATION, "40001", "40P01"}
+
+
+def _sqlstate(error):
+    cause = error.__cause__
+    return getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+
+
+def _is_unique_violation(error):
+    sqlstate = _sqlstate(error)
+    if sqlstate is None and isinstance(error, IntegrityError):
+        # Backends without SQLSTATE codes, e.g. SQLite
+        return "UNIQUE" in str(error).upper()
+
+    return sqlstate == UNIQUE_VIOLATION
+
+
+def _is_retryable(error):
+    return (
+        _is_unique_violation(error)
+        or _sqlstate(error) in RETRYABLE_SQLSTATES
+    )
+
+
+def create_order(tickets_data, **order_data):
+    """Create an order with its tickets, retrying on write conflicts.
+
+    Every attempt runs in its own transaction.  Seats taken by a
+    concurrent order are reported as a SeatConflict; unique violations,
+    serialization failures and deadlocks are retried a bounded number of
+    times with jittered exponential backoff.  When the retries run out, a
+    unique violation is still a seat conflict, while the other failures
+    are reported as BookingUnavailable (503) so clients retry later.
+    """
+    attempts = settings.BOOKING_RETRY_ATTEMPTS
+    backoff = settings.BOOKING_RETRY_BACKOFF
+
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(**order_data)
+                book_tickets(order, tickets_data)
+                return order
+        except (IntegrityError, OperationalError) as error:
+            if not _is_retryable(error):
+                raise
+            if attempt == attempts:
+                if _is_unique_violation(error):
+                    raise SeatConflict() from error
+                raise BookingUnavailable() from error
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1))
+
+
+def book_tickets(order, tickets_data):
+    """Validate and insert all tickets of an order in one batch.
+
+    Journeys are loaded (and row-locked) with their trains in a single
+    query, seats are checked against each journey's seat map, and the
+    tickets and the updated seat maps are written with one bulk query
+    each.
+    """
+    journey_ids = {ticket_data["journey_id"] for ticket_data in tickets_data}
+    journeys = {
+        journey.pk: journey
+        for journey in Journey.objects.select_for_update(of=("self",))
+        .select_related("train")
+        .filter(pk__in=journey_ids)
+        .order_by("pk")
+    }
+
+    errors = []
+    conflicts = []
+    requested = set()
+    for ticket_data in tickets_data:
+        journey = journeys.get(ticket_data["journey_id"])
+        cargo, seat = ticket_data["cargo"], ticket_data["seat"]
+        errors.append({})
+
+        if journey is None:
+            errors[-1] = {
+                "journey": f"Invalid pk \"{ticket_data['journey_id']}\" - "
+                f"object does not exist."
+            }
+            continue
+
+        try:
+            Ticket.validate_ticket(
+                cargo=cargo,
+                seat=seat,
+                train=journey.train,
+                error_to_raise=ValidationError,
+            )
+        except ValidationError as error:
+            errors[-1] = error.detail
+            continue
+
+        place = (journey.pk, cargo, seat)
+        if place in requested:
+            errors[-1] = {"seat": "Seat is listed twice in this order."}
+        elif journey.is_place_taken(cargo, seat):
+            conflicts.append(place)
+        requested.add(place)
+
+    if any(errors):
+        raise ValidationError({"tickets": errors})
+    if conflicts:
+        raise SeatConflict(conflicts)
+
+    tickets = Ticket.objects.bulk_create(
+        [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+    )
+
+    taken = {journey_id: [] for journey_id in journeys}
+    for journey_id, cargo, seat in requested:
+        taken[journey_id].append((cargo, seat))
+    for journey in journeys.values():
+        journey.mark_places(taken[journey.pk])
+        # The rows are locked, so the loaded counters are current
+        journey.tickets_sold += len(taken[journey.pk])
+    Journey.objects.bulk_update(
+        journeys.values(), ["seat_map", "tickets_sold"]
+    )
+    bump_version_on_commit("ticket")
+    for journey in journeys.values():
+        publish_on_commit(seat_event(journey, taken=taken[journey.pk]))
+
+    return tickets
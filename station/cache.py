@@ -0,0 +1,88 @@
+import hashlib
+import time
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from station.db_router import replicas_in_use, use_primary
+from station.models import ResourceVersion
+
+
+def _create_versions(resources):
+    # Start from a timestamp so a recreated counter never reuses
+    # versions that may still be cached
+    now = timezone.now()
+    ResourceVersion.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [
+            ResourceVersion(
+                name=resource,
+                version=int(time.time() * 1000),
+                modified_at=now,
+            )
+            for resource in resources
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def get_versions(*resources):
+    """{resource: (version counter, last change)} of cached resources.
+
+    Counters are database rows, so every process sees the same versions.
+    They are read from the database the data of this context is read
+    from: a lagging replica returns the versions of the data it has,
+    not newer ones that would get its outdated data cached under them.
+    """
+    rows = ResourceVersion.objects.filter(name__in=resources)
+    versions = {
+        name: (version, modified_at)
+        for name, version, modified_at in rows.values_list(
+            "name", "version", "modified_at"
+        )
+    }
+    missing = [resource for resource in resources if resource not in versions]
+    if missing:
+        _create_versions(missing)
+        if replicas_in_use():
+            # The replica has not got the new counters yet, the rest
+            # of the context reads data and counters from the primary
+            use_primary()
+        return get_versions(*resources)
+
+    return versions
+
+
+def get_version(resource):
+    """Current version counter of a cached resource"""
+    return get_versions(resource)[resource][0]
+
+
+def bump_version(*resources):
+    """Invalidate everything cached against the given resources"""
+    updated = (
+        ResourceVersion.objects.using(DEFAULT_DB_ALIAS)
+        .filter(name__in=resources)
+        .update(version=F("version") + 1, modified_at=timezone.now())
+    )
+    if updated < len(set(resources)):
+        _create_versions(resources)
+
+
+def bump_version_on_commit(*resources):
+    transaction.on_commit(lambda: bump_version(*resources))
+
+
+def versioned_key(prefix, resources, *parts, versions=None):
+    """Cache key that changes whenever one of the resources changes.
+
+    ``versions`` saves the query when get_versions() was already called.
+    """
+    if versions is None:
+        versions = get_versions(*resources)
+    digest = hashlib.md5(
+        "|".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    version = ".".join(str(versions[resource][0]) for resource in resources)
+
+    return f"{prefix}:{version}:{digest}"
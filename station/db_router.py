@@ -0,0 +1,96 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "station_primary_pin"
+PIN_SALT = "station.db_router.primary-pin"
+
+# Replica alias the reads of this context are routed to, if any
+_replica_reads = ContextVar("replica_reads", default=None)
+
+
+def use_replicas():
+    """Routes the following reads of this context to one replica.
+
+    All of them use the same replica, so data and the version counters
+    it is cached under are read as of the same point in time. Returns a
+    token for reset_replicas().
+    """
+    replica = None
+    if settings.DATABASE_REPLICAS:
+        replica = random.choice(settings.DATABASE_REPLICAS)
+
+    return _replica_reads.set(replica)
+
+
+def use_primary():
+    """Routes the following reads of this context to the primary"""
+    return _replica_reads.set(None)
+
+
+def reset_replicas(token):
+    _replica_reads.reset(token)
+
+
+def replicas_in_use():
+    return _replica_reads.get() is not None
+
+
+def pin_to_primary(response, user):
+    """Serves the user's replica reads from the primary for a while.
+
+    Called after the user writes, so they see their own changes even
+    while the replicas lag behind. The pin is a signed cookie on
+    response, which every process can check.
+    """
+    if settings.DATABASE_REPLICAS:
+        response.set_signed_cookie(
+            PIN_COOKIE,
+            str(user.pk),
+            salt=PIN_SALT,
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+
+
+def is_pinned_to_primary(request):
+    if not request.user.is_authenticated:
+        return False
+
+    pinned = request.get_signed_cookie(
+        PIN_COOKIE,
+        default=None,
+        salt=PIN_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS,
+    )
+    return pinned == str(request.user.pk)
+
+
+class ReplicaRouter:
+    """Sends reads to a random replica where views opted in.
+
+    Writes and every query inside a transaction stay on the primary,
+    and so does everything when no replicas are configured.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = _replica_reads.get()
+        if replica not in settings.DATABASE_REPLICAS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,141 @@
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+from station.models import Train
+from station.serializers import JourneyListSerializer, TrainListSerializer
+
+
+class RowEncoder:
+    """Renders values_list() rows exactly like a list serializer.
+
+    ``columns`` maps each serializer field to the lookup or expression
+    of its row column; to-many fields are instead loaded for a whole
+    page by ``related`` functions taking the row ids. Only the fields in
+    ``convert`` go through their serializer field's to_representation(),
+    everything else is already what the serializer would have output.
+    """
+
+    def __init__(self, serializer_class, columns, convert=(), related=None):
+        self.serializer_class = serializer_class
+        self.columns = columns
+        self.convert = convert
+        self.related = related or {}
+
+    def rows(self, queryset):
+        """Named rows of queryset, one column per encoded field"""
+        lookups = []
+        annotations = {}
+        for field, lookup in self.columns.items():
+            if isinstance(lookup, str):
+                lookups.append(lookup)
+            else:
+                annotations[f"row_{field}"] = lookup
+                lookups.append(f"row_{field}")
+
+        # Rows keep the attributes keyset pagination reads its cursor from
+        rows = queryset.annotate(**annotations).values_list(
+            *lookups, named=True
+        )
+        # The joins of the row columns would be kept when paginators
+        # count the rows, the original queryset counts without them
+        rows.count = queryset.count
+
+        return rows
+
+    @cached_property
+    def fields(self):
+        return tuple(self.serializer_class.Meta.fields)
+
+    @cached_property
+    def convert_columns(self):
+        columns = list(self.columns)
+
+        return tuple((columns.index(field), field) for field in self.convert)
+
+    def converters(self, context):
+        """(column index, to_representation) for encoding one page"""
+        serializer_fields = self.serializer_class(context=context).fields
+        converters = []
+        for index, name in self.convert_columns:
+            field = serializer_fields[name]
+            if isinstance(field, serializers.DateTimeField) and not hasattr(
+                field, "timezone"
+            ):
+                # Looked up for every value otherwise, which costs more
+                # than the conversion itself
+                field.timezone = field.default_timezone()
+            converters.append((index, field.to_representation))
+
+        return converters
+
+    @cached_property
+    def related_positions(self):
+        return tuple(
+            (position, field)
+            for position, field in enumerate(self.fields)
+            if field in self.related
+        )
+
+    def encode(self, rows, context=None):
+        """Serialized representation of rows, ready for the renderer"""
+        rows = list(rows)
+        ids = [row.id for row in rows]
+        related = {field: load(ids) for field, load in self.related.items()}
+        fields = self.fields
+        converters = self.converters(context or {})
+        related_positions = self.related_positions
+
+        data = []
+        for row in rows:
+            values = list(row)
+            for index, to_representation in converters:
+                if values[index] is not None:
+                    values[index] = to_representation(values[index])
+            for position, field in related_positions:
+                values.insert(position, related[field].get(row.id, []))
+            data.append(dict(zip(fields, values)))
+
+        return data
+
+
+def load_crew_names(train_ids):
+    """{train id: crew full names ordered by crew id}"""
+    names = {}
+    for train_id, first_name, last_name in (
+        Train.crew.through.objects.filter(train_id__in=train_ids)
+        .order_by("crew_id")
+        .values_list("train_id", "crew__first_name", "crew__last_name")
+    ):
+        names.setdefault(train_id, []).append(f"{first_name} {last_name}")
+
+    return names
+
+
+JOURNEY_LIST_ENCODER = RowEncoder(
+    JourneyListSerializer,
+    {
+        "id": "id",
+        "route_distance": "route__distance",
+        "train_name": "train__name",
+        "train_type": "train__train_type__name",
+        "departure_time": "departure_time",
+        "tickets_available": F("train__seats") - F("tickets_sold"),
+    },
+    convert=("departure_time",),
+)
+
+TRAIN_LIST_ENCODER = RowEncoder(
+    TrainListSerializer,
+    {
+        "id": "id",
+        "name": "name",
+        "cargo_num": "cargo_num",
+        "place_in_cargo": "place_in_cargo",
+        "seats": "seats",
+        "train_type": "train_type__name",
+        "images": "image",
+    },
+    convert=("images",),
+    related={"crew": load_crew_names},
+)
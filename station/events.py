@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "station_seat_events"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def seat_event(journey, taken=(), released=()):
+    """Seat delta of a journey, taken after its seat map was updated"""
+    return {
+        "type": "seats",
+        "journey": journey.pk,
+        "taken": [list(place) for place in sorted(taken)],
+        "released": [list(place) for place in sorted(released)],
+        "tickets_available": journey.tickets_available,
+    }
+
+
+def reset_event(journey_id):
+    """Tells subscribers to reload the availability of a journey"""
+    return {"type": "reset", "journey": journey_id}
+
+
+class Subscription:
+    """Queue of events of one journey for one connected client"""
+
+    def __init__(self, broker, journey_id, loop):
+        self.broker = broker
+        self.journey_id = journey_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event):
+        """Enqueue from the event loop thread, collapsing on overflow"""
+        if self.queue.full():
+            # A slow client gets one reset instead of the backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = reset_event(self.journey_id)
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class SeatEventBroker:
+    """In-process fan-out of seat events to subscribed clients.
+
+    Events may be delivered from any thread; every subscription is fed
+    on the event loop it was created on.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, journey_id):
+        subscription = Subscription(
+            self, journey_id, asyncio.get_running_loop()
+        )
+        with self.lock:
+            self.subscriptions.setdefault(journey_id, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.journey_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.journey_id]
+
+    def deliver(self, event):
+        with self.lock:
+            subscriptions = list(
+                self.subscriptions.get(event["journey"], ())
+            )
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, event
+                )
+            except RuntimeError:
+                # The loop of a disconnected client was closed
+                subscription.close()
+
+    def publish(self, event):
+        self.deliver(event)
+
+
+class PostgresSeatEventBroker(SeatEventBroker):
+    """Fans events out to every worker through LISTEN/NOTIFY.
+
+    Published events are only sent with NOTIFY; a listener thread with
+    its own connection delivers them to the local subscribers, including
+    those of the publishing worker.
+    """
+
+    def __init__(self, using="default"):
+        super().__init__()
+        self.using = using
+        self.listener = None
+
+    def subscribe(self, journey_id):
+        self.start_listener()
+        return super().subscribe(journey_id)
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(
+                    target=self.listen, name="seat-events", daemon=True
+                )
+                self.listener.start()
+
+    def listen(self):
+        # psycopg 3 connection, outside Django's per-thread handling
+        wrapper = connections.create_connection(self.using)
+        try:
+            wrapper.ensure_connection()
+            wrapper.connection.execute(f"LISTEN {CHANNEL}")
+            for notify in wrapper.connection.notifies():
+                self.deliver(json.loads(notify.payload))
+        except Exception:
+            logger.exception("Seat event listener stopped")
+        finally:
+            wrapper.close()
+
+    def publish(self, event):
+        payload = json.dumps(event, separators=(",", ":"))
+        if len(payload) > MAX_NOTIFY_PAYLOAD:
+            payload = json.dumps(reset_event(event["journey"]))
+
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+
+BACKENDS = {
+    "local": SeatEventBroker,
+    "postgres": PostgresSeatEventBroker,
+}
+
+
+def get_broker():
+    """Per-process seat event broker of the configured backend"""
+    global _broker
+
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = BACKENDS[settings.SEAT_EVENTS_BACKEND]()
+
+    return _broker
+
+
+def publish_on_commit(event):
+    transaction.on_commit(lambda: get_broker().publish(event), robust=True)
@@ -0,0 +1,25 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BookingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The booking could not be completed, please retry."
+    default_code = "booking_unavailable"
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seat_conflict"
+
+    def __init__(self, conflicts=()):
+        super().__init__()
+        self.conflicts = list(conflicts)
+        self.detail = {
+            "detail": self.default_detail,
+            "conflicts": [
+                {"journey": journey_id, "cargo": cargo, "seat": seat}
+                for journey_id, cargo, seat in self.conflicts
+            ],
+        }
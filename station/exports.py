@@ -0,0 +1,121 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from station.models import Ticket
+
+# Rows fetched per round trip of the server-side cursor
+CHUNK_SIZE = 2000
+# Lines joined into one chunk of the streamed response
+LINES_PER_CHUNK = 500
+
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# (column, lookup from Ticket) of every exported row
+COLUMNS = (
+    ("order_id", "order_id"),
+    ("order_created_at", "order__created_at"),
+    ("user_email", "order__user__email"),
+    ("ticket_id", "id"),
+    ("cargo", "cargo"),
+    ("seat", "seat"),
+    ("journey_id", "journey_id"),
+    ("departure_time", "journey__departure_time"),
+    ("arrival_time", "journey__arrival_time"),
+    ("route_id", "journey__route_id"),
+    ("source", "journey__route__source__name"),
+    ("destination", "journey__route__destination__name"),
+    ("distance", "journey__route__distance"),
+    ("train_id", "journey__train_id"),
+    ("train_name", "journey__train__name"),
+    ("train_type", "journey__train__train_type__name"),
+)
+HEADER = [column for column, _ in COLUMNS]
+
+
+def _date_to_datetime(date):
+    """Converts a date to the aware datetime of its midnight"""
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def date_range_filters(field, date_from=None, date_to=None):
+    """Lookups keeping datetimes of field within the given days"""
+    filters = {}
+    if date_from:
+        filters[f"{field}__gte"] = _date_to_datetime(date_from)
+    if date_to:
+        filters[f"{field}__lt"] = _date_to_datetime(
+            date_to + timedelta(days=1)
+        )
+
+    return filters
+
+
+def export_rows(date_from=None, date_to=None):
+    """Ticket rows with their order, journey, route and train.
+
+    Rows are read through a server-side cursor in chunks, so memory
+    use does not grow with the size of the export.
+    """
+    queryset = Ticket.objects.order_by(
+        "order__created_at", "order_id", "id"
+    ).filter(**date_range_filters("order__created_at", date_from, date_to))
+
+    return queryset.values_list(
+        *(lookup for _, lookup in COLUMNS)
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+class Echo:
+    """File-like object returning what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        )
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(HEADER, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(file_format, date_from=None, date_to=None):
+    rows = export_rows(date_from, date_to)
+    if file_format == "ndjson":
+        return ndjson_lines(rows)
+
+    return csv_lines(rows)
+
+
+def chunks(lines):
+    """Joins lines into fewer, larger chunks for streaming"""
+    lines = iter(lines)
+    while chunk := "".join(islice(lines, LINES_PER_CHUNK)):
+        yield chunk
+
+
+async def achunks(lines):
+    """chunks() for ASGI, reading the rows in a worker thread.
+
+    Django would otherwise buffer a synchronous iterator completely
+    before serving it asynchronously. All chunks are read on the same
+    thread, so the server-side cursor stays on one connection.
+    """
+    iterator = chunks(lines)
+    next_chunk = sync_to_async(lambda: next(iterator, None))
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
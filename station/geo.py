@@ -0,0 +1,176 @@
+import heapq
+import math
+import threading
+
+from station.cache import get_version
+from station.models import Station
+
+EARTH_RADIUS_KM = 6371.0088
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def to_unit_vector(latitude, longitude):
+    """Point on the unit sphere for a latitude/longitude in degrees"""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (
+        math.cos(lat) * math.cos(lon),
+        math.cos(lat) * math.sin(lon),
+        math.sin(lat),
+    )
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle distance in kilometers"""
+    lat1, lat2 = math.radians(latitude1), math.radians(latitude2)
+    d_lat = lat2 - lat1
+    d_lon = math.radians(longitude2 - longitude1)
+    half_chord = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(half_chord)))
+
+
+def chord_for_distance(distance):
+    """Straight-line distance on the unit sphere for a surface distance"""
+    angle = min(distance / EARTH_RADIUS_KM, math.pi)
+    return 2 * math.sin(angle / 2)
+
+
+class StationIndex:
+    """KD-tree over station positions on the unit sphere.
+
+    Euclidean (chord) distance between unit vectors grows monotonically
+    with great-circle distance, so nearest neighbours in 3D are nearest
+    neighbours on the globe and haversine is only evaluated for the
+    stations that are returned.
+    """
+
+    def __init__(self, stations, version=None):
+        self.stations = list(stations)
+        self.points = [
+            to_unit_vector(station["latitude"], station["longitude"])
+            for station in self.stations
+        ]
+        self.tree = self._build(list(range(len(self.stations))), 0)
+        self.version = version
+
+    @classmethod
+    def from_database(cls, version=None):
+        return cls(
+            Station.objects.values("id", "name", "latitude", "longitude"),
+            version=version,
+        )
+
+    def _build(self, indexes, depth):
+        if not indexes:
+            return None
+
+        axis = depth % 3
+        indexes.sort(key=lambda index: self.points[index][axis])
+        middle = len(indexes) // 2
+
+        return (
+            indexes[middle],
+            axis,
+            self._build(indexes[:middle], depth + 1),
+            self._build(indexes[middle + 1:], depth + 1),
+        )
+
+    def _squared_distance(self, index, point):
+        return sum(
+            (a - b) ** 2 for a, b in zip(self.points[index], point)
+        )
+
+    def _search(self, node, point, visit, radius):
+        """Depth-first walk visiting the nearer subtree first.
+
+        ``visit(index, squared_distance)`` is called for every candidate
+        and ``radius()`` returns the current squared search radius used
+        to prune the farther subtree.
+        """
+        if node is None:
+            return
+
+        index, axis, left, right = node
+        visit(index, self._squared_distance(index, point))
+        delta = point[axis] - self.points[index][axis]
+        near, far = (left, right) if delta < 0 else (right, left)
+
+        self._search(near, point, visit, radius)
+        if delta ** 2 <= radius():
+            self._search(far, point, visit, radius)
+
+    def _with_distances(self, latitude, longitude, indexes):
+        results = []
+        for index in indexes:
+            station = dict(self.stations[index])
+            station["distance"] = round(
+                haversine(
+                    latitude,
+                    longitude,
+                    station["latitude"],
+                    station["longitude"],
+                ),
+                3,
+            )
+            results.append(station)
+
+        return sorted(results, key=lambda station: station["distance"])
+
+    def nearest(self, latitude, longitude, limit):
+        """The limit stations closest to the coordinate"""
+        point = to_unit_vector(latitude, longitude)
+        heap = []
+
+        def visit(index, squared_distance):
+            if len(heap) < limit:
+                heapq.heappush(heap, (-squared_distance, index))
+            elif squared_distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-squared_distance, index))
+
+        def radius():
+            return -heap[0][0] if len(heap) == limit else float("inf")
+
+        self._search(self.tree, point, visit, radius)
+
+        return self._with_distances(
+            latitude, longitude, [index for _, index in heap]
+        )
+
+    def within(self, latitude, longitude, radius):
+        """All stations within radius kilometers of the coordinate"""
+        point = to_unit_vector(latitude, longitude)
+        limit = chord_for_distance(radius) ** 2
+        found = []
+
+        def visit(index, squared_distance):
+            if squared_distance <= limit:
+                found.append(index)
+
+        self._search(self.tree, point, visit, lambda: limit)
+
+        return [
+            station
+            for station in self._with_distances(latitude, longitude, found)
+            if station["distance"] <= radius
+        ]
+
+
+def get_station_index():
+    """Per-process station index, rebuilt when stations change.
+
+    Checks the version counter shared by all processes, so changes made
+    through any of them rebuild it.
+    """
+    global _index
+
+    version = get_version("station")
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = StationIndex.from_database(version=version)
+
+    return _index
@@ -0,0 +1,140 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.decorators import (
+    api_view,
+    permission_classes,
+    throttle_classes,
+)
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from station.serializers import DatabaseHealthSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Runs a trivial query and reports its latency or the error"""
+    started = time.perf_counter()
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError as error:
+        return {"ok": False, "error": str(error)}
+
+    return {
+        "ok": True,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def wait_for_database(
+    alias=DEFAULT_DB_ALIAS,
+    timeout=None,
+    interval=0.5,
+    max_interval=5,
+    on_retry=None,
+):
+    """Checks the database until it answers, backing off exponentially.
+
+    Gives up after ``timeout`` seconds if set and returns the result
+    of the last check. ``on_retry`` is called with the failed result
+    and the delay before the next check.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not (result := check_database(alias))["ok"]:
+        if deadline is not None:
+            interval = min(interval, deadline - time.monotonic())
+            if interval <= 0:
+                break
+
+        if on_retry:
+            on_retry(result, interval)
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+    return result
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS):
+    """Connection pool metrics of this process, None without a pool"""
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+
+    return {
+        "min_size": stats.get("pool_min", 0),
+        "max_size": stats.get("pool_max", 0),
+        "size": stats.get("pool_size", 0),
+        "available": stats.get("pool_available", 0),
+        "in_use": in_use,
+        "waiting": stats.get("requests_waiting", 0),
+        "checkouts": stats.get("requests_num", 0),
+        "queued": stats.get("requests_queued", 0),
+        "wait_ms": stats.get("requests_wait_ms", 0),
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_opened": stats.get("connections_num", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+        "saturation": (
+            round(in_use / stats["pool_max"], 3)
+            if stats.get("pool_max")
+            else 0
+        ),
+    }
+
+
+@extend_schema(
+    responses={
+        status.HTTP_200_OK: DatabaseHealthSerializer,
+        status.HTTP_503_SERVICE_UNAVAILABLE: DatabaseHealthSerializer,
+    }
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+# Polled by load balancers and orchestrators, faster than any anon rate
+@throttle_classes([])
+def database_health(request):
+    """Endpoint for the health of every database.
+
+    Anyone gets the status of each database, staff also get latencies,
+    errors and the connection pool of the serving process.
+    """
+    databases = {}
+    for alias in [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]:
+        databases[alias] = check_database(alias)
+        databases[alias]["pool"] = pool_stats(alias)
+        if not databases[alias]["ok"]:
+            logger.error(
+                "Database %s is unavailable: %s",
+                alias,
+                databases[alias]["error"],
+            )
+
+    healthy = all(database["ok"] for database in databases.values())
+    data = {"status": "ok" if healthy else "unavailable"}
+    if request.user.is_staff:
+        data["pool_mode"] = settings.DB_POOL_MODE
+    else:
+        databases = {
+            alias: {"ok": database["ok"]}
+            for alias, database in databases.items()
+        }
+    data["databases"] = databases
+
+    return Response(
+        data,
+        status=(
+            status.HTTP_200_OK
+            if healthy
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+    )
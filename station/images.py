@@ -0,0 +1,185 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from PIL import Image, ImageOps
+
+from station.models import Train
+
+# format in URLs: (Pillow format, content type)
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+DERIVATIVES_DIR = "derivatives"
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def get_executor():
+    """Pool resizing images, Pillow releases the GIL while it works"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix="image-derivatives",
+            )
+
+    return _executor
+
+
+def derivative_name(name, size, image_format):
+    """Storage name of a derivative of the image stored as name"""
+    return f"{DERIVATIVES_DIR}/{size}/{name}.{image_format}"
+
+
+def derivative_url(name, size, image_format, request=None):
+    url = reverse(
+        "journey:train-image",
+        kwargs={"size": size, "name": name, "image_format": image_format},
+    )
+    if request is not None:
+        return request.build_absolute_uri(url)
+
+    return url
+
+
+def render_derivative(original, size, image_format):
+    """Bytes of original resized to fit size, encoded as image_format"""
+    with Image.open(original) as image:
+        # Lets JPEG decode straight at a fraction of the full resolution
+        image.draft("RGB", size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        if image_format == "jpeg" and has_alpha:
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        output = BytesIO()
+        image.save(
+            output,
+            FORMATS[image_format][0],
+            quality=settings.IMAGE_QUALITY,
+            optimize=image_format == "jpeg",
+            progressive=image_format == "jpeg",
+        )
+
+    return output.getvalue()
+
+
+def build_derivative(name, size, image_format):
+    """Resizes the stored image name and stores the derivative"""
+    target = derivative_name(name, size, image_format)
+    if not default_storage.exists(target):
+        with default_storage.open(name) as original:
+            content = render_derivative(
+                original, settings.TRAIN_IMAGE_SIZES[size], image_format
+            )
+        saved = default_storage.save(target, ContentFile(content))
+        if saved != target:
+            # Another process stored it first, the storage gave this
+            # copy a free name instead of overwriting
+            default_storage.delete(saved)
+
+    return target
+
+
+def _generation_done(target, future):
+    _pending.pop(target, None)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(
+            "Generating %s failed",
+            target,
+            exc_info=future.exception(),
+        )
+
+
+def generate_derivative(name, size, image_format):
+    """Future of the derivative's storage name, generated by the pool.
+
+    Concurrent requests for a missing derivative share the same
+    generation instead of resizing the image again.
+    """
+    target = derivative_name(name, size, image_format)
+    with _pending_lock:
+        future = _pending.get(target)
+        if future is None:
+            future = get_executor().submit(
+                build_derivative, name, size, image_format
+            )
+            _pending[target] = future
+            future.add_done_callback(
+                lambda done: _generation_done(target, done)
+            )
+
+    return future
+
+
+def delete_derivatives(name):
+    """Deletes every derivative of the image stored as name"""
+    for size in settings.TRAIN_IMAGE_SIZES:
+        for image_format in FORMATS:
+            default_storage.delete(derivative_name(name, size, image_format))
+
+
+@require_safe
+def train_image(request, size, name, image_format):
+    """Resized train image, generated after the first request for it.
+
+    Until it is stored, requests are redirected to the original image
+    instead of waiting for the pool.
+    """
+    if (
+        size not in settings.TRAIN_IMAGE_SIZES
+        or image_format not in FORMATS
+        or ".." in name.split("/")
+    ):
+        raise Http404
+
+    target = derivative_name(name, size, image_format)
+    if not default_storage.exists(target):
+        if not (
+            Train.objects.filter(image=name).exists()
+            and default_storage.exists(name)
+        ):
+            raise Http404
+        generate_derivative(name, size, image_format)
+
+        return HttpResponse(
+            status=307,
+            headers={
+                "Location": request.build_absolute_uri(
+                    default_storage.url(name)
+                ),
+                "Cache-Control": "no-store",
+            },
+        )
+
+    response = FileResponse(
+        default_storage.open(target),
+        content_type=FORMATS[image_format][1],
+    )
+    # Names embed the unique name of the original, so they never change
+    response["Cache-Control"] = (
+        f"public, max-age={settings.IMAGE_CACHE_SECONDS}, immutable"
+    )
+
+    return response
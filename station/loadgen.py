@@ -0,0 +1,213 @@
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def read_traces(lines):
+    """Request traces from JSONL lines.
+
+    Every line is an object with ``method`` and ``path`` and optionally
+    ``body`` (JSON) and ``user`` (email of the user to authenticate as).
+    Blank lines and lines that are not request traces are skipped.
+    """
+    traces = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            trace = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(trace, dict) or not {"method", "path"} <= set(
+            trace
+        ):
+            continue
+
+        traces.append(
+            {
+                "method": trace["method"].upper(),
+                "path": trace["path"],
+                "body": trace.get("body"),
+                "user": trace.get("user"),
+            }
+        )
+
+    return traces
+
+
+class ReplayStats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.exceptions = 0
+        self.started = None
+        self.finished = None
+
+    def record(self, status, latency):
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+
+    def record_exception(self, latency):
+        self.latencies.append(latency)
+        self.exceptions += 1
+
+    @property
+    def errors(self):
+        return self.exceptions + sum(
+            count for status, count in self.statuses.items() if status >= 400
+        )
+
+    def percentile(self, fraction):
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+    def histogram(self):
+        buckets = Counter()
+        for latency in self.latencies:
+            for bound in LATENCY_BUCKETS:
+                if latency <= bound:
+                    buckets[bound] += 1
+                    break
+            else:
+                buckets[math.inf] += 1
+
+        return [
+            (bound, buckets[bound])
+            for bound in (*LATENCY_BUCKETS, math.inf)
+        ]
+
+    def summary(self):
+        total = len(self.latencies)
+        elapsed = (self.finished or time.perf_counter()) - self.started
+
+        return {
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "statuses": {
+                str(status): count
+                for status, count in sorted(self.statuses.items())
+            },
+            "exceptions": self.exceptions,
+            "latency_ms": {
+                "p50": round(self.percentile(0.50), 3),
+                "p90": round(self.percentile(0.90), 3),
+                "p99": round(self.percentile(0.99), 3),
+                "max": round(max(self.latencies, default=0.0), 3),
+            },
+            "histogram_ms": [
+                {"le": "+Inf" if bound == math.inf else bound, "count": count}
+                for bound, count in self.histogram()
+            ],
+        }
+
+
+class AsgiReplayer:
+    """Replays request traces against an ASGI application in-process"""
+
+    def __init__(self, application, tokens=None, host="localhost"):
+        self.application = application
+        self.tokens = tokens or {}
+        self.host = host
+        self.stats = ReplayStats()
+
+    def build_scope(self, trace):
+        url = urlsplit(trace["path"])
+        headers = [
+            (b"host", self.host.encode()),
+            (b"accept", b"application/json"),
+        ]
+        if trace["body"] is not None:
+            headers.append((b"content-type", b"application/json"))
+        token = self.tokens.get(trace["user"])
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": trace["method"],
+            "scheme": "http",
+            "path": url.path,
+            "raw_path": url.path.encode(),
+            "query_string": url.query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": (self.host, 80),
+        }
+
+    async def send_request(self, trace):
+        """Run one request through the application, returning its status"""
+        body = b""
+        if trace["body"] is not None:
+            body = json.dumps(trace["body"]).encode()
+        request_sent = False
+        response = {}
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body}
+            # The client never disconnects early
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+
+        await self.application(self.build_scope(trace), receive, send)
+        return response.get("status", 500)
+
+    async def replay_one(self, trace):
+        started = time.perf_counter()
+        try:
+            status = await self.send_request(trace)
+        except Exception:
+            self.stats.record_exception(
+                (time.perf_counter() - started) * 1000
+            )
+        else:
+            self.stats.record(status, (time.perf_counter() - started) * 1000)
+
+    async def max_throughput(self, traces, total, concurrency):
+        """Keep ``concurrency`` requests in flight until total are sent"""
+        queue = asyncio.Queue()
+        for number in range(total):
+            queue.put_nowait(traces[number % len(traces)])
+
+        async def worker():
+            while not queue.empty():
+                await self.replay_one(queue.get_nowait())
+
+        self.stats.started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        self.stats.finished = time.perf_counter()
+
+    async def constant_rate(self, traces, total, rate):
+        """Start requests at a fixed arrival rate, independent of latency"""
+        self.stats.started = time.perf_counter()
+        tasks = []
+        for number in range(total):
+            delay = self.stats.started + number / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(
+                asyncio.create_task(
+                    self.replay_one(traces[number % len(traces)])
+                )
+            )
+        await asyncio.gather(*tasks)
+        self.stats.finished = time.perf_counter()
@@ -0,0 +1,118 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from station.benchmarks import (
+    SCALES,
+    compare_reports,
+    run_benchmarks,
+    run_list_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    """Seeds data in a rolled back transaction and benchmarks endpoints"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", choices=sorted(SCALES), default="small"
+        )
+        for entity in SCALES["tiny"]:
+            parser.add_argument(
+                f"--{entity}",
+                type=int,
+                help=f"Override the number of seeded {entity}",
+            )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file"
+        )
+        parser.add_argument(
+            "--compare", help="Previous JSON report to compare against"
+        )
+        parser.add_argument(
+            "--list-rows",
+            type=int,
+            help="Instead compare list serializers with the row encoders "
+            "on pages of this many rows",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive")
+
+        if options["list_rows"] is not None:
+            return self.benchmark_lists(options)
+
+        scale = dict(SCALES[options["scale"]])
+        for entity in scale:
+            if options[entity] is not None:
+                scale[entity] = options[entity]
+        if scale["stations"] < 2 or min(scale.values()) < 1:
+            raise CommandError(
+                "At least two stations and one of everything else "
+                "are required"
+            )
+
+        self.stdout.write(f"Benchmarking with {scale}...")
+        report = run_benchmarks(
+            scale,
+            iterations=options["iterations"],
+            random_seed=options["seed"],
+        )
+
+        for result in report["results"]:
+            self.stdout.write(
+                f"{result['method']:<5}{result['endpoint']:<28}"
+                f"queries={result['queries']:<4}"
+                f"p50={result['p50_ms']:>9.2f}ms "
+                f"p99={result['p99_ms']:>9.2f}ms "
+                f"bytes={result['bytes']}"
+            )
+
+        if options["compare"]:
+            with open(options["compare"]) as previous_file:
+                previous = json.load(previous_file)
+            self.stdout.write("Changes against previous report:")
+            for endpoint, metric, old, new, change in compare_reports(
+                previous, report
+            ):
+                if old != new:
+                    self.stdout.write(
+                        f"{endpoint:<28}{metric:<8}{old} -> {new} "
+                        f"({change:+.1f}%)"
+                    )
+
+        self.write_report(report, options["output"])
+
+    def benchmark_lists(self, options):
+        if options["list_rows"] < 1:
+            raise CommandError("--list-rows must be positive")
+
+        self.stdout.write(
+            f"Benchmarking list pages of {options['list_rows']} rows..."
+        )
+        report = run_list_benchmarks(
+            options["list_rows"],
+            iterations=options["iterations"],
+            random_seed=options["seed"],
+        )
+
+        for result in report["results"]:
+            self.stdout.write(
+                f"{result['endpoint']:<16}"
+                f"serializer p50={result['serializer']['p50_ms']:>9.2f}ms "
+                f"encoder p50={result['encoder']['p50_ms']:>9.2f}ms "
+                f"speedup={result['speedup']:.2f}x"
+            )
+
+        self.write_report(report, options["output"])
+
+    def write_report(self, report, output):
+        if output:
+            with open(output, "w") as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {output}")
+            )
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from station.exports import CONTENT_TYPES, export_lines
+
+
+class Command(BaseCommand):
+    """Streams orders with their tickets as CSV or NDJSON"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=list(CONTENT_TYPES), default="csv"
+        )
+        parser.add_argument(
+            "--date-from",
+            type=date.fromisoformat,
+            help="Earliest order date (inclusive), YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--date-to",
+            type=date.fromisoformat,
+            help="Latest order date (inclusive), YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--output", help="Write the export here instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        date_from, date_to = options["date_from"], options["date_to"]
+        if date_from and date_to and date_from > date_to:
+            raise CommandError("--date-to must not be before --date-from")
+
+        lines = export_lines(options["format"], date_from, date_to)
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output_file:
+                output_file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from station.schedules import materialize, pending_schedules
+
+
+class Command(BaseCommand):
+    """Rolls the journeys of all schedules forward to the horizon"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.JOURNEY_SCHEDULE_HORIZON_DAYS,
+            help="Days ahead to create journeys for",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Schedules materialized per transaction",
+        )
+
+    def handle(self, *args, **options):
+        until = timezone.localdate() + timedelta(days=options["days"])
+        schedules = pending_schedules(until).order_by("id")
+
+        materialized = 0
+        extended = 0
+        last_id = 0
+        while batch := list(
+            schedules.filter(id__gt=last_id)[: options["batch_size"]]
+        ):
+            materialized += materialize(batch, until)
+            extended += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Materialized {materialized} journeys of {extended} "
+                f"schedules up to {until.isoformat()}"
+            )
+        )
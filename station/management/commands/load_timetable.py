@@ -0,0 +1,71 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from station.timetable import BATCH_SIZE, TimetableLoader, read_rows
+
+
+class Command(BaseCommand):
+    """Bulk-loads journeys from a CSV or JSON Lines timetable.
+
+    Every row is one journey with source, destination, train (name),
+    departure_time and arrival_time, plus distance for new routes and
+    <source|destination>_latitude/_longitude for new stations.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("timetable", help="Path to the timetable file")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format, guessed from the extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the changes without writing them",
+        )
+        parser.add_argument(
+            "--quiet",
+            action="store_true",
+            help="Only print errors and the summary",
+        )
+
+    def report(self, line):
+        if line.startswith("!"):
+            self.stderr.write(line)
+        elif not self.quiet:
+            self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        file_format = options["format"]
+        if file_format is None:
+            extension = os.path.splitext(options["timetable"])[1].lower()
+            file_format = "csv" if extension == ".csv" else "jsonl"
+
+        self.quiet = options["quiet"]
+        loader = TimetableLoader(
+            dry_run=options["dry_run"],
+            batch_size=options["batch_size"],
+            report=self.report,
+        )
+        with open(options["timetable"], newline="") as timetable_file:
+            stats = loader.load(read_rows(timetable_file, file_format))
+
+        self.stdout.write(
+            f"{stats['rows']} rows in {stats['seconds']}s "
+            f"({stats['rows_per_second']} rows/s)"
+        )
+        summary = ", ".join(
+            f"{name.replace('_', ' ')}: {value}"
+            for name, value in stats.items()
+            if name not in ("rows", "seconds", "rows_per_second")
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run, nothing written. {summary}")
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
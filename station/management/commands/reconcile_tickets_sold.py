@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from station.cache import bump_version_on_commit
+from station.models import Journey
+
+
+class Command(BaseCommand):
+    """Fixes journey tickets_sold counters that drifted from the tickets"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drifted journeys",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Journey.objects.annotate(actual=Count("ticket"))
+            .exclude(tickets_sold=F("actual"))
+            .order_by("id")
+            .values_list("id", "tickets_sold", "actual")
+        )
+
+        fixed = 0
+        for journey_id, tickets_sold, actual in drifted:
+            self.stdout.write(
+                f"Journey {journey_id}: tickets_sold={tickets_sold}, "
+                f"tickets={actual}"
+            )
+            if options["dry_run"]:
+                continue
+
+            with transaction.atomic():
+                # Recount under the row lock bookings take, so a booking
+                # committed since the scan above is not undone
+                journey = (
+                    Journey.objects.select_for_update()
+                    .filter(pk=journey_id)
+                    .first()
+                )
+                if journey is None:
+                    continue
+
+                journey.tickets_sold = journey.ticket_set.count()
+                journey.save(update_fields=["tickets_sold"])
+                bump_version_on_commit("ticket")
+            fixed += 1
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} journeys drifted")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Reconciled {fixed} journeys")
+            )
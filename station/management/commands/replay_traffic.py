@@ -0,0 +1,114 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.loadgen import AsgiReplayer, read_traces
+
+
+class Command(BaseCommand):
+    """Replays JSONL request traces against the ASGI application"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("traces", help="Path to a JSONL trace file")
+        parser.add_argument(
+            "--mode", choices=["max", "rate"], default="max"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Requests in flight in max mode",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=50.0,
+            help="Requests started per second in rate mode",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            help="Total requests to send, cycling over the traces",
+        )
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument(
+            "--no-throttle",
+            action="store_true",
+            help="Disable DRF throttling while replaying",
+        )
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def get_tokens(self, traces):
+        emails = {trace["user"] for trace in traces if trace["user"]}
+        users = get_user_model().objects.filter(email__in=emails)
+        tokens = {
+            user.email: str(AccessToken.for_user(user)) for user in users
+        }
+
+        for email in sorted(emails - set(tokens)):
+            self.stderr.write(f"Unknown user {email}, sent anonymously")
+
+        return tokens
+
+    def handle(self, *args, **options):
+        with open(options["traces"]) as traces_file:
+            traces = read_traces(traces_file)
+        if not traces:
+            raise CommandError("No request traces found")
+
+        total = options["requests"] or len(traces)
+        if options["concurrency"] < 1 or options["rate"] <= 0 or total < 1:
+            raise CommandError(
+                "--concurrency, --rate and --requests must be positive"
+            )
+
+        from journey.asgi import application
+
+        replayer = AsgiReplayer(
+            application, tokens=self.get_tokens(traces), host=options["host"]
+        )
+        if options["mode"] == "max":
+            replay = replayer.max_throughput(
+                traces, total, options["concurrency"]
+            )
+        else:
+            replay = replayer.constant_rate(traces, total, options["rate"])
+
+        self.stdout.write(
+            f"Replaying {total} requests from {len(traces)} traces "
+            f"in {options['mode']} mode..."
+        )
+        if options["no_throttle"]:
+            with mock.patch.object(APIView, "throttle_classes", ()):
+                asyncio.run(replay)
+        else:
+            asyncio.run(replay)
+
+        summary = replayer.stats.summary()
+        self.stdout.write(
+            f"{summary['requests']} requests in {summary['elapsed_s']}s: "
+            f"{summary['throughput_rps']} req/s, "
+            f"error rate {summary['error_rate']:.2%}"
+        )
+        self.stdout.write(
+            "Latency ms: "
+            + ", ".join(
+                f"{name}={value}"
+                for name, value in summary["latency_ms"].items()
+            )
+        )
+        self.stdout.write(f"Statuses: {summary['statuses']}")
+        for bucket in summary["histogram_ms"]:
+            self.stdout.write(f"  <= {bucket['le']:>6} ms: {bucket['count']}")
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(summary, output_file, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}")
+            )
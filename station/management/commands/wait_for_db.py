@@ -1,21 +1,41 @@
-import time
-from django.core.management.base import BaseCommand
-from django.db.utils import OperationalError
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from station.health import wait_for_database
 
 
 class Command(BaseCommand):
     """Waits for the database to be available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Alias of the database to wait for",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            help="Give up after this many seconds (waits forever by default)",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-                db_conn.cursor()
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS("Database available!"))
+
+        def report(result, delay):
+            self.stdout.write(
+                f"Database unavailable ({result['error'].strip()}), "
+                f"waiting {delay:.1f} seconds..."
+            )
+
+        result = wait_for_database(
+            options["database"], timeout=options["timeout"], on_retry=report
+        )
+        if not result["ok"]:
+            raise CommandError("Database still unavailable, giving up")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database available! ({result['latency_ms']} ms)"
+            )
+        )
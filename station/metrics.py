@@ -0,0 +1,91 @@
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Metrics are aggregated in process. With PROMETHEUS_MULTIPROC_DIR set
+# before the workers start, prometheus_client keeps them in mmap-backed
+# files there instead and /metrics sums the values of all workers
+BOOKINGS = Counter("station_bookings", "Orders booked")
+SEAT_CONFLICTS = Counter(
+    "station_seat_conflicts",
+    "Orders rejected because a requested seat was taken",
+)
+ORDER_TICKETS = Histogram(
+    "station_order_tickets",
+    "Tickets per booked order",
+    buckets=(1, 2, 3, 4, 5, 10, 20, 50),
+)
+BOOKING_SECONDS = Histogram(
+    "station_booking_transaction_seconds",
+    "Duration of creating an order, including retried transactions",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+JOURNEY_SEARCH_SECONDS = Histogram(
+    "station_journey_search_seconds",
+    "Latency of journey searches",
+    ["cache"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_LOOKUPS = Counter(
+    "station_cache_lookups",
+    "Lookups of cached responses",
+    ["cache", "result"],
+)
+THROTTLED_REQUESTS = Counter(
+    "station_throttled_requests",
+    "Requests rejected by rate limiting",
+    ["scope"],
+)
+
+
+def record_cache_lookup(cache_name, hit):
+    """Counts a lookup and returns its result label, hit or miss"""
+    result = "hit" if hit else "miss"
+    CACHE_LOOKUPS.labels(cache=cache_name, result=result).inc()
+
+    return result
+
+
+def can_scrape(request):
+    """Staff, holders of METRICS_TOKEN and allowed addresses"""
+    if request.user.is_staff:
+        return True
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if (
+        settings.METRICS_TOKEN
+        and scheme.lower() == "bearer"
+        and constant_time_compare(token, settings.METRICS_TOKEN)
+    ):
+        return True
+
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+@require_safe
+def metrics_view(request):
+    """Endpoint for the Prometheus text exposition of all metrics"""
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-16 22:42
+
+from django.db import migrations, models
+
+
+def build_seat_maps(apps, schema_editor):
+    Journey = apps.get_model("station", "Journey")
+    Ticket = apps.get_model("station", "Ticket")
+
+    for journey in Journey.objects.select_related("train").iterator():
+        train = journey.train
+        bits = 0
+        for cargo, seat in Ticket.objects.filter(journey=journey).values_list(
+            "cargo", "seat"
+        ):
+            if 1 <= cargo <= train.cargo_num and 1 <= seat <= train.seats:
+                bits |= 1 << ((cargo - 1) * train.seats + (seat - 1))
+        size = (train.cargo_num * train.seats + 7) // 8
+        journey.seat_map = bits.to_bytes(size, "little")
+        journey.save(update_fields=["seat_map"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0007_train_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="seat_map",
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(build_seat_maps, migrations.RunPython.noop),
+    ]
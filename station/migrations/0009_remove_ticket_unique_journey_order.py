@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-16 22:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0008_journey_seat_map"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together=set(),
+        ),
+    ]
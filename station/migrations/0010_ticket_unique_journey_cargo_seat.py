@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-16 22:44
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_tickets(apps, schema_editor):
+    """Stops the migration while any seat is booked by several tickets"""
+    Ticket = apps.get_model("station", "Ticket")
+    duplicates = (
+        Ticket.objects.values("journey_id", "cargo", "seat")
+        .annotate(tickets=Count("id"))
+        .filter(tickets__gt=1)
+        .order_by("journey_id", "cargo", "seat")
+    )
+    conflicts = [
+        f"  journey {seat['journey_id']} cargo {seat['cargo']} "
+        f"seat {seat['seat']}: tickets "
+        + ", ".join(
+            str(ticket_id)
+            for ticket_id in Ticket.objects.filter(
+                journey_id=seat["journey_id"],
+                cargo=seat["cargo"],
+                seat=seat["seat"],
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for seat in duplicates
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "Cannot make ticket seats unique, these seats are "
+            "double-booked:\n" + "\n".join(conflicts) + "\n"
+            "Cancel or move the extra tickets and run the migration again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0009_remove_ticket_unique_journey_order"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_duplicate_tickets, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("journey", "cargo", "seat"),
+                name="unique_ticket_journey_cargo_seat",
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.2 on 2026-10-16 23:13
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0013_journey_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JourneySchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekdays",
+                    models.CharField(
+                        default="1234567",
+                        max_length=7,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^(?!.*(.).*\\1)[1-7]+$",
+                                "Enter distinct ISO weekday numbers, 1 (Monday) to 7 (Sunday).",
+                            )
+                        ],
+                    ),
+                ),
+                ("departure", models.TimeField()),
+                ("duration", models.DurationField()),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                ("materialized_until", models.DateField(editable=False, null=True)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="station.route",
+                    ),
+                ),
+                (
+                    "train",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="station.train",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="journeys",
+                to="station.journeyschedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="journey",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "departure_time"),
+                name="unique_journey_schedule_departure",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-16 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0014_journey_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResourceVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("version", models.BigIntegerField()),
+                ("modified_at", models.DateTimeField()),
+            ],
+        ),
+    ]
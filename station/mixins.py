@@ -0,0 +1,178 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from station.cache import get_versions
+from station.db_router import (
+    is_pinned_to_primary,
+    reset_replicas,
+    use_replicas,
+)
+
+
+class ReplicaReadMixin:
+    """Serves safe requests from the read replicas.
+
+    ``replica_actions`` limits this to some actions. Users who just
+    placed an order keep reading from the primary for a while.
+    """
+
+    replica_actions = None
+
+    def reads_from_replicas(self, request):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and (
+                self.replica_actions is None
+                or self.action in self.replica_actions
+            )
+            and not is_pinned_to_primary(request)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.reads_from_replicas(request):
+            self.replica_token = use_replicas()
+
+    def read_from_primary(self):
+        """Sends the remaining reads of this request to the primary"""
+        token = getattr(self, "replica_token", None)
+        if token is not None:
+            self.replica_token = None
+            reset_replicas(token)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.read_from_primary()
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class FastListMixin:
+    """Renders list pages from values_list() rows with ``row_encoder``.
+
+    The output is the same as the list serializer's without building
+    model instances or walking serializer fields for every row.
+    FAST_LIST_SERIALIZERS set to False falls back to the serializer.
+    """
+
+    row_encoder = None
+
+    def serialize_page(self, queryset):
+        """Serialized page of queryset, or all of it when not paginated"""
+        fast = settings.FAST_LIST_SERIALIZERS
+        if fast:
+            queryset = self.row_encoder.rows(queryset)
+
+        page = self.paginate_queryset(queryset)
+        self.paginated = page is not None
+        if page is not None:
+            queryset = page
+
+        if fast:
+            return self.row_encoder.encode(
+                queryset, self.get_serializer_context()
+            )
+        return self.get_serializer(queryset, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        data = self.serialize_page(self.filter_queryset(self.get_queryset()))
+        if self.paginated:
+            return self.get_paginated_response(data)
+
+        return Response(data)
+
+
+class ConditionalGetMixin:
+    """Adds ETag/Last-Modified validators to list and retrieve.
+
+    Validators are derived from the version counters of
+    ``cache_resources``, read in one query, so a matching If-None-Match
+    or If-Modified-Since is answered with 304 Not Modified before the
+    queryset is evaluated or anything is serialized.
+    """
+
+    cache_resources = ()
+
+    def get_resource_versions(self):
+        """Versions of cache_resources, read once per request"""
+        if getattr(self, "resource_versions", None) is None:
+            self.resource_versions = get_versions(*self.cache_resources)
+
+        return self.resource_versions
+
+    def get_etag(self, request, versions):
+        version = ".".join(
+            str(versions[resource][0]) for resource in self.cache_resources
+        )
+        digest = hashlib.md5(
+            "|".join(
+                [
+                    version,
+                    request.get_host(),
+                    request.get_full_path(),
+                    request.accepted_media_type or "",
+                ]
+            ).encode()
+        ).hexdigest()
+
+        return quote_etag(digest)
+
+    def get_last_modified(self, versions):
+        return int(
+            max(
+                versions[resource][1] for resource in self.cache_resources
+            ).timestamp()
+        )
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or etag in etags
+
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since", "")
+        )
+        return bool(if_modified_since and last_modified <= if_modified_since)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        versions = self.get_resource_versions()
+        etag = self.get_etag(request, versions)
+        last_modified = self.get_last_modified(versions)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(last_modified),
+            "Cache-Control": "private, no-cache",
+        }
+
+        if self.is_not_modified(request, etag, last_modified):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in headers.items():
+                response[header] = value
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().retrieve, *args, **kwargs
+        )
@@ -1,9 +1,12 @@
 import os
 import uuid
+from datetime import datetime, timedelta
 
-from django.db import models
+from django.core.validators import RegexValidator
+from django.db import models, transaction
 from django.conf import settings
 from django.db.models import UniqueConstraint
+from django.utils import timezone
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 
@@ -42,6 +45,14 @@ class Route(models.Model):
     )
     distance = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["source", "destination"],
+                name="route_source_destination_idx",
+            )
+        ]
+
     def __str__(self):
         return (
             f"Source: {self.source}, "
@@ -101,6 +112,79 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="order_user_created_idx",
+            )
+        ]
+
+
+class JourneySchedule(models.Model):
+    """Recurring departure of a train on a route.
+
+    Its journeys are created ahead of time only up to a horizon, see
+    ``station.schedules``. ``materialized_until`` is the last date
+    whose journeys exist.
+    """
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="schedules"
+    )
+    train = models.ForeignKey(
+        Train,
+        on_delete=models.CASCADE,
+        related_name="schedules"
+    )
+    weekdays = models.CharField(
+        max_length=7,
+        default="1234567",
+        validators=[
+            RegexValidator(
+                r"^(?!.*(.).*\1)[1-7]+$",
+                "Enter distinct ISO weekday numbers, 1 (Monday) "
+                "to 7 (Sunday).",
+            )
+        ],
+    )
+    departure = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    materialized_until = models.DateField(null=True, editable=False)
+
+    def __str__(self):
+        return (
+            f"Route: {self.route}, "
+            f"Train {self.train}, "
+            f"Weekdays: {self.weekdays}, "
+            f"Departure: {self.departure}"
+        )
+
+    def dates(self, start, end):
+        """Dates between start and end (inclusive) the schedule runs on"""
+        date = max(start, self.valid_from)
+        end = min(end, self.valid_until)
+        while date <= end:
+            if str(date.isoweekday()) in self.weekdays:
+                yield date
+            date += timedelta(days=1)
+
+    def make_journey(self, date):
+        """Unsaved journey of the schedule departing on date"""
+        departure_time = timezone.make_aware(
+            datetime.combine(date, self.departure)
+        )
+
+        return Journey(
+            schedule=self,
+            route_id=self.route_id,
+            train_id=self.train_id,
+            departure_time=departure_time,
+            arrival_time=departure_time + self.duration,
+        )
 
 
 class Journey(models.Model):
@@ -116,9 +200,34 @@ class Journey(models.Model):
     )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    seat_map = models.BinaryField(default=bytes)
+    tickets_sold = models.PositiveIntegerField(default=0)
+    schedule = models.ForeignKey(
+        JourneySchedule,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="journeys"
+    )
 
     class Meta:
         ordering = ["-departure_time"]
+        constraints = [
+            UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="unique_journey_schedule_departure",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"],
+                name="journey_route_departure_idx",
+            ),
+            models.Index(
+                fields=["departure_time", "id"],
+                name="journey_departure_id_idx",
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -128,6 +237,92 @@ class Journey(models.Model):
             f"Arrival time: {self.arrival_time}"
         )
 
+    @staticmethod
+    def seat_index(train, cargo, seat):
+        """Position of a (cargo, seat) place in the seat map"""
+        return (cargo - 1) * train.seats + (seat - 1)
+
+    def _get_seat_bits(self):
+        return int.from_bytes(bytes(self.seat_map), "little")
+
+    def _set_seat_bits(self, bits):
+        size = (self.train.cargo_num * self.train.seats + 7) // 8
+        self.seat_map = bits.to_bytes(size, "little")
+
+    @property
+    def taken_places(self):
+        """List of taken (cargo, seat) places decoded from the seat map"""
+        bits = self._get_seat_bits()
+        seats = self.train.seats
+        places = []
+        while bits:
+            lowest = bits & -bits
+            index = lowest.bit_length() - 1
+            places.append((index // seats + 1, index % seats + 1))
+            bits ^= lowest
+
+        return places
+
+    @property
+    def taken_seats(self):
+        return sorted(seat for _, seat in self.taken_places)
+
+    @property
+    def tickets_taken(self):
+        return self._get_seat_bits().bit_count()
+
+    @property
+    def tickets_available(self):
+        return self.train.seats - self.tickets_sold
+
+    def is_place_taken(self, cargo, seat):
+        index = Journey.seat_index(self.train, cargo, seat)
+        return bool(self._get_seat_bits() >> index & 1)
+
+    def mark_places(self, places, taken=True):
+        """Set or clear (cargo, seat) places in the in-memory seat map"""
+        bits = self._get_seat_bits()
+        for cargo, seat in places:
+            index = Journey.seat_index(self.train, cargo, seat)
+            if taken:
+                bits |= 1 << index
+            else:
+                bits &= ~(1 << index)
+        self._set_seat_bits(bits)
+
+    def rebuild_seat_map(self):
+        """Recompute the seat map and sold count from the stored tickets"""
+        places = list(self.ticket_set.values_list("cargo", "seat"))
+        self.tickets_sold = len(places)
+        self._set_seat_bits(0)
+        self.mark_places(
+            (cargo, seat)
+            for cargo, seat in places
+            if 1 <= cargo <= self.train.cargo_num
+            and 1 <= seat <= self.train.seats
+        )
+
+    @classmethod
+    def update_seat_map(cls, journey_id, taken=(), released=()):
+        """Apply seat changes to a journey under a row lock"""
+        with transaction.atomic():
+            journey = (
+                cls.objects.select_for_update(of=("self",))
+                .select_related("train")
+                .filter(pk=journey_id)
+                .first()
+            )
+            if journey is None:
+                return None
+
+            journey.mark_places(taken, taken=True)
+            journey.mark_places(released, taken=False)
+            # The row is locked, so the loaded counter is current
+            journey.tickets_sold += len(taken) - len(released)
+            journey.save(update_fields=["seat_map", "tickets_sold"])
+
+            return journey
+
 
 class Ticket(models.Model):
     cargo = models.IntegerField()
@@ -143,7 +338,12 @@ class Ticket(models.Model):
     )
 
     class Meta:
-        unique_together = ["journey", "order"]
+        constraints = [
+            UniqueConstraint(
+                fields=["journey", "cargo", "seat"],
+                name="unique_ticket_journey_cargo_seat",
+            )
+        ]
         ordering = ["seat"]
 
     @staticmethod
@@ -182,3 +382,14 @@ class Ticket(models.Model):
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
         )
+
+
+class ResourceVersion(models.Model):
+    """Version counter of a cached resource, shared by every process"""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField()
+    modified_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
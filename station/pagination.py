@@ -0,0 +1,196 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+    PageNumberPagination,
+)
+from rest_framework.utils.urls import replace_query_param
+
+
+class OrderSetPagination(PageNumberPagination):
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on a unique tuple of ordering fields.
+
+    The cursor holds the ordering values of the first or last row of a
+    page, and the next page is the rows strictly after them, so every
+    page is a single index range scan no matter how deep it is and no
+    COUNT is run.
+
+    Clients opt in by sending ``cursor`` (empty for the first page);
+    other requests are paginated by ``fallback_class`` as before.
+    """
+
+    ordering = ("id",)
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    fallback_class = LimitOffsetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.cursor_query_param not in request.query_params:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        position, reverse = self.decode_cursor(request)
+
+        ordering = [
+            self.invert(field) if reverse else field
+            for field in self.ordering
+        ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if not self.page:
+            # Paged past either end, only offer a way back to the start
+            self.has_next = False
+
+        return self.page
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def after(ordering, position):
+        """Rows that come strictly after position in the given ordering"""
+        conditions = []
+        for depth, field in enumerate(ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition = {
+                name.lstrip("-"): value
+                for name, value in zip(ordering[:depth], position)
+            }
+            condition[f"{field.lstrip('-')}__{lookup}"] = position[depth]
+            conditions.append(Q(**condition))
+
+        return reduce(or_, conditions)
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            model_field = self.model._meta.get_field(field.lstrip("-"))
+            position.append(model_field.value_to_string(instance))
+
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")))
+            if not all(
+                isinstance(value, (str, int, float)) for value in cursor["p"]
+            ):
+                # Ordering fields are not null, lookups on None or on
+                # lists and objects fail in the database
+                raise ValueError
+            position = [
+                self.model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(
+                    self.ordering, cursor["p"], strict=True
+                )
+            ]
+            return position, bool(cursor.get("r"))
+        except (TypeError, KeyError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        encoded = b64encode(
+            json.dumps({"p": position, "r": int(reverse)}).encode()
+        ).decode("ascii")
+
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if self.fallback is not None:
+            return self.fallback.get_next_link()
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if self.fallback is not None:
+            return self.fallback.get_previous_link()
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(
+                self.base_url, self.cursor_query_param, ""
+            )
+
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = self.fallback_class().get_paginated_response_schema(
+            schema
+        )
+        # count is only returned without a cursor
+        response_schema["required"] = ["results"]
+
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = self.fallback_class().get_schema_operation_parameters(
+            view
+        )
+        parameter_names = {parameter["name"] for parameter in parameters}
+
+        return parameters + [
+            parameter
+            for parameter in super().get_schema_operation_parameters(view)
+            if parameter["name"] not in parameter_names
+        ]
+
+    def get_html_context(self):
+        if self.fallback is not None:
+            return self.fallback.get_html_context()
+
+        return super().get_html_context()
+
+
+class JourneyPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+    fallback_class = OrderSetPagination
+
+
+class TicketPagination(KeysetPagination):
+    ordering = ("id",)
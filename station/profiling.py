@@ -0,0 +1,167 @@
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("station.slow_requests")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+
+
+def fingerprint(sql):
+    """SQL with literals and parameter lists replaced, for grouping"""
+    sql = _LITERALS.sub("?", sql)
+    sql = _VALUE_LISTS.sub("(...)", sql)
+
+    return " ".join(sql.split())
+
+
+class QueryProfile:
+    """Execute wrapper recording the queries of one request"""
+
+    def __init__(self):
+        self.statements = {}
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            # Fingerprints are only computed once per distinct statement,
+            # after the request
+            statement = self.statements.setdefault(sql, [0, 0.0])
+            statement[0] += 1
+            statement[1] += elapsed
+
+    def fingerprints(self):
+        """{fingerprint: [count, seconds]} of the recorded queries"""
+        grouped = {}
+        for sql, (count, seconds) in self.statements.items():
+            entry = grouped.setdefault(fingerprint(sql), [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+
+        return grouped
+
+    @property
+    def repeated(self):
+        """Queries repeating an earlier one up to literals, e.g. N+1"""
+        return self.count - len(self.fingerprints())
+
+    def top(self, limit):
+        return sorted(
+            self.fingerprints().items(),
+            key=lambda item: item[1][1],
+            reverse=True,
+        )[:limit]
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.seconds * 1000:.3f};desc="{self.count} queries", '
+            f'db-repeated;desc="{self.repeated} repeated"'
+        )
+
+
+def profile_queries(profile):
+    """Installs profile on every database connection until closed"""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(profile))
+
+    return stack
+
+
+class QueryProfilerMiddleware:
+    """Profiles the queries of a sample of requests.
+
+    Sampled responses carry the query count, database time and number
+    of repeated queries in a Server-Timing header. Requests slower than
+    QUERY_PROFILER_SLOW_MS are logged with their costliest queries.
+    With QUERY_PROFILER_SAMPLE_RATE at 0 the middleware removes itself.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILER_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return random.random() < settings.QUERY_PROFILER_SAMPLE_RATE
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with profile_queries(profile):
+            response = self.get_response(request)
+
+        return self.finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        # The ORM runs queries in the request's sync thread, whose
+        # connections differ from those seen by async code
+        wrappers = await sync_to_async(profile_queries)(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+
+        return self.finish(request, response, profile, started)
+
+    def finish(self, request, response, profile, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timing = profile.server_timing()
+        if response.has_header("Server-Timing"):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response["Server-Timing"] = timing
+
+        if elapsed_ms >= settings.QUERY_PROFILER_SLOW_MS:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d queries in %.1f ms, "
+                "%d repeated\n%s",
+                request.method,
+                request.get_full_path(),
+                elapsed_ms,
+                profile.count,
+                profile.seconds * 1000,
+                profile.repeated,
+                "\n".join(
+                    f"  {count} x {seconds * 1000:.1f} ms: {sql}"
+                    for sql, (count, seconds) in profile.top(
+                        settings.QUERY_PROFILER_TOP_QUERIES
+                    )
+                ),
+            )
+
+        return response
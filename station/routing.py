@@ -0,0 +1,208 @@
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from station.cache import get_versions
+from station.models import Journey
+
+TIMETABLE_RESOURCES = ("route", "journey")
+# Journeys that arrived before now minus this margin are left out of the
+# index, trips are only planned from now on
+PAST_MARGIN = timedelta(hours=1)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def to_timestamp(value):
+    return int(value.timestamp())
+
+
+def from_timestamp(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+class Connection:
+    """Field positions of a connection tuple in the index"""
+
+    DEPARTURE = 0
+    ARRIVAL = 1
+    SOURCE = 2
+    DESTINATION = 3
+    JOURNEY = 4
+    DISTANCE = 5
+
+
+class Itinerary:
+    def __init__(self, legs):
+        self.legs = legs
+        self.journeys = []
+
+    @property
+    def journey_ids(self):
+        return [leg[Connection.JOURNEY] for leg in self.legs]
+
+    @property
+    def departure_time(self):
+        return from_timestamp(self.legs[0][Connection.DEPARTURE])
+
+    @property
+    def arrival_time(self):
+        return from_timestamp(self.legs[-1][Connection.ARRIVAL])
+
+    @property
+    def transfers(self):
+        return len(self.legs) - 1
+
+    @property
+    def distance(self):
+        return sum(leg[Connection.DISTANCE] for leg in self.legs)
+
+
+class ConnectionIndex:
+    """In-memory timetable for the connection scan algorithm.
+
+    Every journey is stored as a connection tuple of
+    (departure, arrival, source, destination, journey_id, distance),
+    timestamps being POSIX seconds, sorted by departure.
+    """
+
+    def __init__(self, connections, version=None):
+        self.connections = sorted(connections)
+        self.departures = [
+            connection[Connection.DEPARTURE]
+            for connection in self.connections
+        ]
+        self.outgoing = {}
+        for connection in self.connections:
+            self.outgoing.setdefault(
+                connection[Connection.SOURCE], set()
+            ).add(connection[Connection.DESTINATION])
+        self.version = version
+
+    @classmethod
+    def from_database(cls, version=None):
+        """Index of the journeys that have not arrived yet"""
+        cutoff = datetime.now(timezone.utc) - PAST_MARGIN
+        rows = (
+            Journey.objects.filter(arrival_time__gte=cutoff)
+            .values_list(
+                "departure_time",
+                "arrival_time",
+                "route__source_id",
+                "route__destination_id",
+                "id",
+                "route__distance",
+            )
+            .order_by()
+        )
+
+        return cls(
+            (
+                (
+                    to_timestamp(departure_time),
+                    to_timestamp(arrival_time),
+                    source_id,
+                    destination_id,
+                    journey_id,
+                    distance,
+                )
+                for (
+                    departure_time,
+                    arrival_time,
+                    source_id,
+                    destination_id,
+                    journey_id,
+                    distance,
+                ) in rows
+            ),
+            version=version,
+        )
+
+    def earliest_arrival(self, source, destination, depart_after, transfer):
+        """Connection scan for the earliest arrival at destination.
+
+        Changing trains at an intermediate station requires at least
+        ``transfer`` seconds between arrival and the next departure.
+        Returns the list of connections of the best itinerary, or None.
+        """
+        if source == destination or source not in self.outgoing:
+            return None
+
+        arrival = {}
+        reached_by = {}
+        best = float("inf")
+
+        for position in range(
+            bisect_left(self.departures, depart_after), len(self.connections)
+        ):
+            connection = self.connections[position]
+            departure = connection[Connection.DEPARTURE]
+            if departure >= best:
+                break
+
+            station = connection[Connection.SOURCE]
+            if station != source and (
+                station not in arrival
+                or arrival[station] + transfer > departure
+            ):
+                continue
+
+            target = connection[Connection.DESTINATION]
+            if target == source:
+                continue
+            if connection[Connection.ARRIVAL] < arrival.get(
+                target, float("inf")
+            ):
+                arrival[target] = connection[Connection.ARRIVAL]
+                reached_by[target] = connection
+                if target == destination:
+                    best = arrival[target]
+
+        if destination not in reached_by:
+            return None
+
+        legs = []
+        station = destination
+        while station != source:
+            leg = reached_by[station]
+            legs.append(leg)
+            station = leg[Connection.SOURCE]
+
+        return legs[::-1]
+
+    def itineraries(self, source, destination, depart_after, transfer, limit):
+        """Earliest-arrival itineraries for successive departures"""
+        results = []
+        while len(results) < limit:
+            legs = self.earliest_arrival(
+                source, destination, depart_after, transfer
+            )
+            if legs is None:
+                break
+
+            results.append(Itinerary(legs))
+            depart_after = legs[0][Connection.DEPARTURE] + 1
+
+        return results
+
+
+def get_connection_index():
+    """Per-process connection index, rebuilt when the timetable changes.
+
+    Checks the version counters shared by all processes, so changes
+    made through any of them rebuild it.  It is also rebuilt once a day
+    to drop the journeys that have arrived since.
+    """
+    global _index
+
+    versions = get_versions(*TIMETABLE_RESOURCES)
+    version = tuple(
+        versions[resource][0] for resource in TIMETABLE_RESOURCES
+    ) + (datetime.now(timezone.utc).date(),)
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = ConnectionIndex.from_database(version=version)
+
+    return _index
@@ -0,0 +1,189 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from station.cache import bump_version_on_commit, versioned_key
+from station.models import Journey, JourneySchedule
+
+# Seconds a materialized range is remembered without asking the database
+MATERIALIZED_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_horizon(start=None):
+    """Last date whose scheduled journeys are kept materialized"""
+    start = start or timezone.localdate()
+    return start + timedelta(days=settings.JOURNEY_SCHEDULE_HORIZON_DAYS)
+
+
+def pending_schedules(until):
+    """Schedules with journeys still to create up to until"""
+    today = timezone.localdate()
+    return JourneySchedule.objects.filter(
+        Q(materialized_until__isnull=True)
+        | (
+            Q(materialized_until__lt=until)
+            & Q(materialized_until__lt=F("valid_until"))
+        ),
+        valid_from__lte=until,
+        valid_until__gte=today,
+    )
+
+
+def materialize(schedules, until):
+    """Creates the journeys of the schedules departing up to until.
+
+    Dates are only materialized once per schedule and journeys that
+    already exist are skipped, so concurrent calls are safe. Returns
+    the number of journeys materialized.
+    """
+    today = timezone.localdate()
+    journeys = []
+    extended = []
+    for schedule in schedules:
+        start = today
+        if schedule.materialized_until:
+            start = max(
+                start, schedule.materialized_until + timedelta(days=1)
+            )
+        end = min(until, schedule.valid_until)
+        if start > end:
+            continue
+
+        journeys.extend(
+            schedule.make_journey(date)
+            for date in schedule.dates(start, end)
+        )
+        schedule.materialized_until = end
+        extended.append(schedule)
+
+    if not extended:
+        return 0
+
+    with transaction.atomic():
+        Journey.objects.bulk_create(journeys, ignore_conflicts=True)
+        JourneySchedule.objects.bulk_update(extended, ["materialized_until"])
+        if journeys:
+            bump_version_on_commit("journey")
+
+    return len(journeys)
+
+
+def materialize_window(schedules, start, end):
+    """Creates the journeys of the schedules departing from start to end.
+
+    Unlike materialize(), materialized_until is left alone: dates past
+    it are only created where queried, the contiguous range is rolled
+    forward by extend_schedules. Journeys that already exist are
+    skipped. Returns the number of journeys created.
+    """
+    journeys = []
+    for schedule in schedules:
+        first = start
+        if schedule.materialized_until:
+            first = max(first, schedule.materialized_until + timedelta(days=1))
+        journeys.extend(
+            schedule.make_journey(date) for date in schedule.dates(first, end)
+        )
+
+    if not journeys:
+        return 0
+
+    existing = set(
+        Journey.objects.filter(
+            schedule__in={journey.schedule_id for journey in journeys},
+            departure_time__range=(
+                min(journey.departure_time for journey in journeys),
+                max(journey.departure_time for journey in journeys),
+            ),
+        ).values_list("schedule_id", "departure_time")
+    )
+    journeys = [
+        journey
+        for journey in journeys
+        if (journey.schedule_id, journey.departure_time) not in existing
+    ]
+    if journeys:
+        with transaction.atomic():
+            Journey.objects.bulk_create(journeys, ignore_conflicts=True)
+            bump_version_on_commit("journey")
+
+    return len(journeys)
+
+
+def ensure_journeys(start, end, **filters):
+    """Lazily creates the scheduled journeys a query may need.
+
+    Only the dates from start to end are created, capped at
+    JOURNEY_SCHEDULE_MAX_DAYS from today, and only for the schedules
+    narrowed by filters, e.g. to the searched stations: without filters
+    nothing is created. Repeated calls are answered from the cache
+    until a schedule changes.
+    """
+    if not filters:
+        return 0
+
+    today = timezone.localdate()
+    start = max(start, today)
+    end = min(end, today + timedelta(days=settings.JOURNEY_SCHEDULE_MAX_DAYS))
+    if start > end:
+        return 0
+
+    cache_key = versioned_key(
+        "schedule-materialized",
+        ("schedule",),
+        start,
+        end,
+        sorted(filters.items()),
+    )
+    if cache.get(cache_key):
+        return 0
+
+    schedules = JourneySchedule.objects.filter(
+        Q(materialized_until__isnull=True) | Q(materialized_until__lt=end),
+        valid_from__lte=end,
+        valid_until__gte=start,
+        **filters,
+    )
+    created = materialize_window(schedules, start, end)
+    cache.set(cache_key, True, MATERIALIZED_CACHE_TIMEOUT)
+
+    return created
+
+
+def get_scheduled_journey(schedule, date):
+    """Journey of a schedule on date, created if not materialized yet"""
+    if date < timezone.localdate() or date not in schedule.dates(date, date):
+        return None
+
+    journey = schedule.make_journey(date)
+    journey, _ = Journey.objects.get_or_create(
+        schedule=schedule,
+        departure_time=journey.departure_time,
+        defaults={
+            "route_id": journey.route_id,
+            "train_id": journey.train_id,
+            "arrival_time": journey.arrival_time,
+        },
+    )
+
+    return journey
+
+
+def release_journeys(schedule):
+    """Deletes the unsold future journeys of a schedule.
+
+    Used when a schedule changes, so its journeys get materialized
+    again from the new timetable. Journeys with tickets are kept.
+    """
+    with transaction.atomic():
+        schedule.journeys.filter(
+            departure_time__gte=timezone.now(), tickets_sold=0
+        ).delete()
+        schedule.materialized_until = None
+        JourneySchedule.objects.filter(pk=schedule.pk).update(
+            materialized_until=None
+        )
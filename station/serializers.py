@@ -1,7 +1,13 @@
-from django.db import transaction
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from station import metrics
+from station.booking import create_order
+from station.exceptions import SeatConflict
+from station.exports import CONTENT_TYPES
+from station.images import FORMATS, derivative_url
 from station.models import (
     Crew,
     Station,
@@ -10,6 +16,7 @@ from station.models import (
     Train,
     Order,
     Journey,
+    JourneySchedule,
     Ticket,
 )
 
@@ -26,6 +33,21 @@ class StationSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "latitude", "longitude")
 
 
+class NearbyStationSearchSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=5)
+    radius = serializers.FloatField(min_value=0, required=False)
+
+
+class NearbyStationSerializer(StationSerializer):
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Station
+        fields = ("id", "name", "latitude", "longitude", "distance")
+
+
 class StationListSerializer(StationSerializer):
     class Meta:
         model = Station
@@ -74,6 +96,41 @@ class TrainSerializer(serializers.ModelSerializer):
         )
 
 
+@extend_schema_field(
+    {
+        "type": "object",
+        "nullable": True,
+        "additionalProperties": {
+            "type": "object",
+            "additionalProperties": {"type": "string", "format": "uri"},
+        },
+    }
+)
+class ImageDerivativesField(serializers.Field):
+    """URLs of the resized versions of an image by size and format"""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        # An ImageField's file or, from values_list() rows, its name
+        name = getattr(value, "name", value)
+        if not name:
+            return None
+
+        request = self.context.get("request")
+        return {
+            size: {
+                image_format: derivative_url(
+                    name, size, image_format, request
+                )
+                for image_format in FORMATS
+            }
+            for size in settings.TRAIN_IMAGE_SIZES
+        }
+
+
 class TrainImageSerializer(TrainSerializer):
     class Meta:
         model = Train
@@ -88,11 +145,19 @@ class TrainListSerializer(TrainSerializer):
         read_only=True,
         slug_field="name"
     )
+    images = ImageDerivativesField(source="image")
+
+    class Meta(TrainSerializer.Meta):
+        fields = TrainSerializer.Meta.fields + ("images",)
 
 
 class TrainRetrieveSerializer(TrainSerializer):
     crew = CrewSerializer(many=True, read_only=True)
     train_type = TrainTypeSerializer()
+    images = ImageDerivativesField(source="image")
+
+    class Meta(TrainSerializer.Meta):
+        fields = TrainSerializer.Meta.fields + ("images",)
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -103,7 +168,10 @@ class TicketSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
-            attrs["seat"], attrs["journey"].train.seats, ValidationError
+            attrs["cargo"],
+            attrs["seat"],
+            attrs["journey"].train,
+            ValidationError,
         )
 
         return data
@@ -138,26 +206,89 @@ class JourneyListSerializer(serializers.ModelSerializer):
         )
 
 
+class OrderTicketSerializer(TicketSerializer):
+    journey = serializers.IntegerField(source="journey_id")
+
+    class Meta:
+        model = Ticket
+        fields = ("id", "cargo", "seat", "journey")
+
+    def validate(self, attrs):
+        # Seats are validated for the whole order at once in book_tickets
+        return attrs
+
+
+class DateRangeSerializer(serializers.Serializer):
+    """Optional date_from and date_to query parameters, both inclusive"""
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError(
+                {"date_to": "date_to must not be earlier than date_from."}
+            )
+
+        return attrs
+
+
+class JourneySearchSerializer(DateRangeSerializer):
+    source = serializers.IntegerField(required=False)
+    destination = serializers.IntegerField(required=False)
+
+
+class OrderExportSerializer(DateRangeSerializer):
+    file_format = serializers.ChoiceField(
+        choices=list(CONTENT_TYPES), default="csv"
+    )
+
+
+class ConnectionSearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure = serializers.DateTimeField(required=False)
+    min_transfer = serializers.IntegerField(
+        min_value=0, default=settings.CONNECTION_MIN_TRANSFER_MINUTES
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=10, default=3)
+
+
+class ConnectionSerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    distance = serializers.IntegerField()
+    legs = JourneyListSerializer(many=True, source="journeys")
+
+
 class TicketListSerializer(TicketSerializer):
     journey = JourneyListSerializer(many=False, read_only=True)
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_null=False)
+    tickets = OrderTicketSerializer(
+        many=True, read_only=False, allow_null=False
+    )
 
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
+        tickets_data = validated_data.pop("tickets")
+        with metrics.BOOKING_SECONDS.time():
+            try:
+                order = create_order(tickets_data, **validated_data)
+            except SeatConflict:
+                metrics.SEAT_CONFLICTS.inc()
+                raise
 
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-
-            return order
+        metrics.BOOKINGS.inc()
+        metrics.ORDER_TICKETS.observe(len(tickets_data))
+        return order
 
 
 class OrderListSerializer(OrderSerializer):
@@ -174,8 +305,8 @@ class JourneyRetrieveSerializer(JourneySerializer):
     route = RouteRetrieveSerializer()
     train = TrainRetrieveSerializer()
 
-    taken_seats = serializers.SlugRelatedField(
-        many=True, read_only=True, slug_field="seat", source="ticket_set"
+    taken_seats = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
     )
 
     class Meta:
@@ -188,3 +319,68 @@ class JourneyRetrieveSerializer(JourneySerializer):
             "arrival_time",
             "taken_seats",
         )
+
+
+class JourneyAvailabilitySerializer(serializers.ModelSerializer):
+    tickets_available = serializers.IntegerField(read_only=True)
+    taken_places = serializers.ListField(
+        child=serializers.ListField(child=serializers.IntegerField()),
+        read_only=True,
+    )
+
+    class Meta:
+        model = Journey
+        fields = ("id", "tickets_available", "taken_places")
+
+
+class JourneyScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JourneySchedule
+        fields = (
+            "id",
+            "route",
+            "train",
+            "weekdays",
+            "departure",
+            "duration",
+            "valid_from",
+            "valid_until",
+            "materialized_until",
+        )
+        read_only_fields = ("materialized_until",)
+
+    def validate(self, attrs):
+        valid_from = attrs.get(
+            "valid_from", getattr(self.instance, "valid_from", None)
+        )
+        valid_until = attrs.get(
+            "valid_until", getattr(self.instance, "valid_until", None)
+        )
+        if valid_from and valid_until and valid_from > valid_until:
+            raise ValidationError(
+                {
+                    "valid_until": "valid_until must not be earlier "
+                    "than valid_from."
+                }
+            )
+
+        return attrs
+
+
+class ScheduledJourneySerializer(serializers.Serializer):
+    date = serializers.DateField()
+
+
+class DatabaseStatusSerializer(serializers.Serializer):
+    ok = serializers.BooleanField()
+    # Staff only
+    latency_ms = serializers.FloatField(required=False)
+    error = serializers.CharField(required=False)
+    pool = serializers.DictField(required=False, allow_null=True)
+
+
+class DatabaseHealthSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=["ok", "unavailable"])
+    # Staff only
+    pool_mode = serializers.CharField(required=False)
+    databases = serializers.DictField(child=DatabaseStatusSerializer())
@@ -0,0 +1,229 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.db import transaction
+from django.dispatch import receiver
+
+from station.cache import bump_version_on_commit
+from station.events import publish_on_commit, reset_event, seat_event
+from station.images import delete_derivatives
+from station.schedules import get_horizon, materialize, release_journeys
+from station.models import (
+    Crew,
+    Journey,
+    JourneySchedule,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+SEAT_FIELDS = {"seat_map", "tickets_sold"}
+SCHEDULE_FIELDS = (
+    "route_id",
+    "train_id",
+    "weekdays",
+    "departure",
+    "duration",
+    "valid_from",
+    "valid_until",
+)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_journey(sender, instance, **kwargs):
+    instance._previous_journey_id = None
+    if instance.pk:
+        instance._previous_journey_id = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("journey_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def take_ticket_seat(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        place = (instance.cargo, instance.seat)
+        journey = Journey.update_seat_map(instance.journey_id, taken=[place])
+        if journey:
+            publish_on_commit(seat_event(journey, taken=[place]))
+        return
+
+    for journey_id in {instance.journey_id, instance._previous_journey_id}:
+        journey = Journey.objects.select_related("train").filter(
+            pk=journey_id
+        ).first()
+        if journey:
+            journey.rebuild_seat_map()
+            journey.save(update_fields=["seat_map", "tickets_sold"])
+            publish_on_commit(reset_event(journey.pk))
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, **kwargs):
+    place = (instance.cargo, instance.seat)
+    journey = Journey.update_seat_map(instance.journey_id, released=[place])
+    if journey:
+        publish_on_commit(seat_event(journey, released=[place]))
+
+
+@receiver(pre_save, sender=Train)
+def remember_train_layout(sender, instance, update_fields=None, **kwargs):
+    instance._previous_layout = None
+    if update_fields is not None and not {"cargo_num", "seats"} & set(
+        update_fields
+    ):
+        return
+
+    if instance.pk:
+        instance._previous_layout = (
+            Train.objects.filter(pk=instance.pk)
+            .values_list("cargo_num", "seats")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Train)
+def resize_train_seat_maps(sender, instance, created, raw=False, **kwargs):
+    layout = (instance.cargo_num, instance.seats)
+    if raw or created or instance._previous_layout in (None, layout):
+        return
+
+    for journey in instance.journeys.select_related("train"):
+        journey.rebuild_seat_map()
+        journey.save(update_fields=["seat_map", "tickets_sold"])
+        publish_on_commit(reset_event(journey.pk))
+
+
+@receiver(pre_save, sender=Journey)
+def remember_journey_train(sender, instance, update_fields=None, **kwargs):
+    instance._previous_train_id = None
+    if update_fields is not None and "train" not in update_fields:
+        return
+
+    if instance.pk:
+        instance._previous_train_id = (
+            Journey.objects.filter(pk=instance.pk)
+            .values_list("train_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Journey)
+def resize_journey_seat_map(sender, instance, created, raw=False, **kwargs):
+    if raw or created or instance._previous_train_id in (
+        None,
+        instance.train_id,
+    ):
+        return
+
+    instance.rebuild_seat_map()
+    Journey.objects.filter(pk=instance.pk).update(
+        seat_map=instance.seat_map, tickets_sold=instance.tickets_sold
+    )
+    publish_on_commit(reset_event(instance.pk))
+
+
+def schedule_timetable(schedule):
+    return tuple(getattr(schedule, field) for field in SCHEDULE_FIELDS)
+
+
+@receiver(pre_save, sender=JourneySchedule)
+def remember_schedule_timetable(sender, instance, **kwargs):
+    instance._previous_timetable = None
+    if instance.pk:
+        previous = JourneySchedule.objects.filter(pk=instance.pk).first()
+        if previous:
+            instance._previous_timetable = schedule_timetable(previous)
+
+
+@receiver(post_save, sender=JourneySchedule)
+def materialize_schedule(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = instance._previous_timetable
+    if previous not in (None, schedule_timetable(instance)):
+        # Unsold journeys are created again from the new timetable
+        release_journeys(instance)
+    materialize([instance], get_horizon())
+
+
+@receiver([post_save, post_delete], sender=Journey)
+def invalidate_journeys(sender, update_fields=None, **kwargs):
+    # Seat map and sold count writes are covered by the ticket version
+    if update_fields is not None and set(update_fields) <= SEAT_FIELDS:
+        return
+
+    bump_version_on_commit("journey")
+
+
+@receiver([post_save, post_delete], sender=JourneySchedule)
+def invalidate_schedules(sender, **kwargs):
+    bump_version_on_commit("schedule")
+
+
+@receiver([post_save, post_delete], sender=Station)
+def invalidate_stations(sender, **kwargs):
+    bump_version_on_commit("station")
+
+
+@receiver([post_save, post_delete], sender=Route)
+def invalidate_routes(sender, **kwargs):
+    bump_version_on_commit("route")
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def invalidate_tickets(sender, **kwargs):
+    bump_version_on_commit("ticket")
+
+
+@receiver([post_save, post_delete], sender=Crew)
+def invalidate_crew(sender, **kwargs):
+    bump_version_on_commit("crew")
+
+
+@receiver([post_save, post_delete], sender=TrainType)
+def invalidate_train_types(sender, **kwargs):
+    bump_version_on_commit("train_type")
+
+
+@receiver([post_save, post_delete], sender=Train)
+@receiver(m2m_changed, sender=Train.crew.through)
+def invalidate_trains(sender, **kwargs):
+    bump_version_on_commit("train")
+
+
+@receiver(pre_save, sender=Train)
+def remember_train_image(sender, instance, **kwargs):
+    instance._previous_image = None
+    if instance.pk:
+        instance._previous_image = (
+            Train.objects.filter(pk=instance.pk)
+            .values_list("image", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Train)
+def delete_replaced_derivatives(sender, instance, raw=False, **kwargs):
+    previous = instance._previous_image
+    if raw or not previous or previous == instance.image.name:
+        return
+
+    transaction.on_commit(lambda: delete_derivatives(previous))
+
+
+@receiver(post_delete, sender=Train)
+def delete_train_derivatives(sender, instance, **kwargs):
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: delete_derivatives(name))
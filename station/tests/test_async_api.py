@@ -0,0 +1,296 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.async_views import seat_event_stream
+from station.throttling import UserRateThrottle
+from station.events import SUBSCRIBER_QUEUE_SIZE, get_broker
+from station.models import Order, Ticket, Train
+from station.tests.test_journey_api import (
+    journey_detail_url,
+    sample_journey,
+)
+
+ASYNC_JOURNEY_URL = reverse("journey:async-journey-list")
+ASYNC_STATION_URL = reverse("journey:async-station-list")
+JOURNEY_URL = reverse("journey:journey-list")
+STATION_URL = reverse("journey:station-list")
+
+
+def async_journey_detail_url(journey_id):
+    return reverse("journey:async-journey-detail", args=[journey_id])
+
+
+def async_availability_url(journey_id):
+    return reverse("journey:async-journey-availability", args=[journey_id])
+
+
+def seat_events_url(journey_id):
+    return reverse("journey:async-journey-seat-events", args=[journey_id])
+
+
+def parse_sse(chunk):
+    event, data = chunk.decode().strip().split("\n")
+    return event.removeprefix("event: "), json.loads(
+        data.removeprefix("data: ")
+    )
+
+
+class AsyncReadApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {
+            "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+
+        self.journey = sample_journey()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=2, seat=5, journey=self.journey, order=order
+        )
+        Ticket.objects.create(
+            cargo=1, seat=3, journey=self.journey, order=order
+        )
+        sample_journey(train=self.journey.train)
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(ASYNC_JOURNEY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", res.headers)
+
+    async def test_invalid_token_rejected(self):
+        res = await self.async_client.get(
+            ASYNC_JOURNEY_URL, headers={"Authorization": "Bearer invalid"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json()["code"], "token_not_valid")
+
+    async def test_write_methods_not_allowed(self):
+        res = await self.async_client.post(
+            ASYNC_JOURNEY_URL, {}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_journey_list_matches_sync_endpoint(self):
+        res = await self.async_client.get(
+            ASYNC_JOURNEY_URL, {"limit": 1, "offset": 1}, headers=self.headers
+        )
+        expected = await self.sync_get(JOURNEY_URL, {"limit": 1, "offset": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], expected.json()["results"])
+        self.assertEqual(res.json()["count"], 2)
+        self.assertIn(ASYNC_JOURNEY_URL, res.json()["previous"])
+
+    async def test_journey_detail_matches_sync_endpoint(self):
+        await Train.objects.filter(pk=self.journey.train_id).aupdate(
+            image="uploads/trains/train.jpg"
+        )
+        res = await self.async_client.get(
+            async_journey_detail_url(self.journey.id), headers=self.headers
+        )
+        expected = await self.sync_get(journey_detail_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+        self.assertIn(b"http://testserver/", res.content)
+
+    async def test_journey_detail_not_found(self):
+        res = await self.async_client.get(
+            async_journey_detail_url(0), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_availability(self):
+        res = await self.async_client.get(
+            async_availability_url(self.journey.id), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(),
+            {
+                "id": self.journey.id,
+                "tickets_available": 8,
+                "taken_places": [[1, 3], [2, 5]],
+            },
+        )
+
+    async def test_station_list_matches_sync_endpoint(self):
+        res = await self.async_client.get(
+            ASYNC_STATION_URL, headers=self.headers
+        )
+        expected = await self.sync_get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+        self.assertEqual(res.json()["count"], 4)
+
+    async def test_throttled_with_the_sync_endpoints(self):
+        with mock.patch.object(
+            UserRateThrottle, "rate", "2/minute", create=True
+        ):
+            await self.sync_get(STATION_URL)
+            res = await self.async_client.get(
+                ASYNC_STATION_URL, headers=self.headers
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            res = await self.async_client.get(
+                async_availability_url(self.journey.id), headers=self.headers
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res.headers)
+
+    async def sync_get(self, url, params=None):
+        return await sync_to_async(self.client.get)(url, params)
+
+
+class SeatEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {
+            "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+        self.journey = sample_journey()
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        res = await self.async_client.get(
+            seat_events_url(self.journey.id), headers=self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        stream = aiter(res.streaming_content)
+
+        event, data = parse_sse(await anext(stream))
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(data["tickets_available"], 10)
+        self.assertEqual(data["taken_places"], [])
+
+        event = {
+            "type": "seats",
+            "journey": self.journey.id,
+            "taken": [[1, 2]],
+            "released": [],
+            "tickets_available": 9,
+        }
+        get_broker().publish(event)
+
+        self.assertEqual(parse_sse(await anext(stream)), ("seats", event))
+        await stream.aclose()
+
+    async def test_closing_stream_unsubscribes(self):
+        subscription = get_broker().subscribe(self.journey.id)
+        stream = seat_event_stream(subscription, {"id": self.journey.id})
+        await anext(stream)
+
+        await stream.aclose()
+
+        self.assertNotIn(self.journey.id, get_broker().subscriptions)
+
+    async def test_reset_sends_fresh_snapshot(self):
+        res = await self.async_client.get(
+            seat_events_url(self.journey.id), headers=self.headers
+        )
+        stream = aiter(res.streaming_content)
+        await anext(stream)
+
+        await sync_to_async(self.journey.mark_places)([(2, 4)])
+        await self.journey.asave(update_fields=["seat_map"])
+        get_broker().publish({"type": "reset", "journey": self.journey.id})
+
+        event, data = parse_sse(await anext(stream))
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(data["taken_places"], [[2, 4]])
+        await stream.aclose()
+
+    async def test_unknown_journey(self):
+        res = await self.async_client.get(
+            seat_events_url(0), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn(0, get_broker().subscriptions)
+
+    async def test_slow_subscriber_collapses_to_reset(self):
+        subscription = get_broker().subscribe(self.journey.id)
+        for _ in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            subscription.put({"type": "seats", "journey": self.journey.id})
+
+        self.assertEqual(
+            await subscription.get(1),
+            {"type": "reset", "journey": self.journey.id},
+        )
+        subscription.close()
+
+    def test_booking_publishes_on_commit(self):
+        payload = {
+            "tickets": [
+                {"cargo": 1, "seat": 2, "journey": self.journey.id},
+                {"cargo": 3, "seat": 1, "journey": self.journey.id},
+            ]
+        }
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                res = self.client.post(
+                    reverse("journey:order-list"), payload, format="json"
+                )
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        publish.assert_called_once_with(
+            {
+                "type": "seats",
+                "journey": self.journey.id,
+                "taken": [[1, 2], [3, 1]],
+                "released": [],
+                "tickets_available": 8,
+            }
+        )
+
+    def test_deleting_ticket_publishes_release(self):
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            cargo=2, seat=5, journey=self.journey, order=order
+        )
+
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket.delete()
+
+        publish.assert_called_once_with(
+            {
+                "type": "seats",
+                "journey": self.journey.id,
+                "taken": [],
+                "released": [[2, 5]],
+                "tickets_available": 10,
+            }
+        )
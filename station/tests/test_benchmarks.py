@@ -0,0 +1,69 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings, tag
+
+from station.benchmarks import (
+    SCALES,
+    compare_reports,
+    run_benchmarks,
+    run_list_benchmarks,
+)
+
+
+@tag("benchmark")
+class EndpointBenchmarkTests(TestCase):
+    """Run with ``python manage.py test --tag benchmark``"""
+
+    def test_every_endpoint_responds(self):
+        report = run_benchmarks(SCALES["tiny"], iterations=2)
+
+        for result in report["results"]:
+            with self.subTest(endpoint=result["endpoint"]):
+                self.assertTrue(
+                    all(200 <= code < 300 for code in result["status"]),
+                    result,
+                )
+
+    def test_list_query_counts_do_not_grow_with_data(self):
+        small = run_benchmarks(SCALES["tiny"], iterations=1)
+        large = run_benchmarks(
+            dict(SCALES["tiny"], journeys=60, orders=30, tickets=120),
+            iterations=1,
+        )
+
+        for endpoint, metric, old, new, _ in compare_reports(small, large):
+            if metric == "queries" and endpoint in (
+                "order-list",
+                "journey-search",
+                "ticket-list",
+            ):
+                with self.subTest(endpoint=endpoint):
+                    self.assertEqual(old, new)
+
+    def test_list_pages_match_with_row_encoders(self):
+        report = run_list_benchmarks(rows=50, iterations=2)
+
+        for result in report["results"]:
+            with self.subTest(endpoint=result["endpoint"]):
+                self.assertEqual(result["encoder"]["status"], [200])
+                self.assertEqual(
+                    result["encoder"]["bytes"], result["serializer"]["bytes"]
+                )
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+            # Stands in for a train list cache shared by all workers
+            "train_list": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "shared-train-list",
+            },
+        }
+    )
+    def test_shared_caches_are_left_alone(self):
+        caches["train_list"].set("page", "cached")
+
+        run_list_benchmarks(rows=5, iterations=1)
+
+        self.assertEqual(caches["train_list"].get("page"), "cached")
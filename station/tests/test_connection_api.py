@@ -0,0 +1,219 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.models import Journey, ResourceVersion, Route
+from station.routing import ConnectionIndex
+from station.tests.test_journey_api import sample_station, sample_train
+
+CONNECTIONS_URL = reverse("journey:journey-connections")
+
+HOUR = 3600
+
+
+def connection(journey_id, source, destination, departure, arrival):
+    return (departure, arrival, source, destination, journey_id, 100)
+
+
+class ConnectionIndexTests(SimpleTestCase):
+    def setUp(self):
+        # Stations: 1 -> 2 -> 3 with a slow direct 1 -> 3
+        self.index = ConnectionIndex(
+            [
+                connection(1, 1, 2, 8 * HOUR, 9 * HOUR),
+                connection(2, 2, 3, 9 * HOUR + 300, 10 * HOUR),
+                connection(3, 2, 3, 10 * HOUR, 11 * HOUR),
+                connection(4, 1, 3, 8 * HOUR, 12 * HOUR),
+                connection(5, 1, 2, 13 * HOUR, 14 * HOUR),
+            ]
+        )
+
+    def journey_ids(self, legs):
+        return [leg[4] for leg in legs]
+
+    def test_earliest_arrival_uses_transfer(self):
+        legs = self.index.earliest_arrival(1, 3, 7 * HOUR, transfer=0)
+
+        self.assertEqual(self.journey_ids(legs), [1, 2])
+
+    def test_minimum_transfer_time_is_respected(self):
+        legs = self.index.earliest_arrival(1, 3, 7 * HOUR, transfer=600)
+
+        self.assertEqual(self.journey_ids(legs), [1, 3])
+
+    def test_unreachable_destination(self):
+        self.assertIsNone(
+            self.index.earliest_arrival(1, 3, 12 * HOUR, transfer=0)
+        )
+        self.assertIsNone(self.index.earliest_arrival(3, 1, 0, transfer=0))
+
+    def test_itineraries_for_successive_departures(self):
+        itineraries = self.index.itineraries(
+            1, 3, 7 * HOUR, transfer=600, limit=5
+        )
+
+        self.assertEqual(
+            [itinerary.journey_ids for itinerary in itineraries],
+            [[1, 3]],
+        )
+
+        itineraries = self.index.itineraries(
+            1, 2, 7 * HOUR, transfer=600, limit=5
+        )
+
+        self.assertEqual(
+            [itinerary.journey_ids for itinerary in itineraries],
+            [[1], [5]],
+        )
+
+
+class ConnectionApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_station("Kyiv")
+        self.lviv = sample_station("Lviv")
+        self.uzhhorod = sample_station("Uzhhorod")
+        self.train = sample_train()
+        self.day = (timezone.now() + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def at(self, hours, minutes=0):
+        return self.day + timedelta(hours=hours, minutes=minutes)
+
+    def create_journey(self, source, destination, departure, arrival):
+        route = Route.objects.create(
+            source=source, destination=destination, distance=300
+        )
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=departure,
+            arrival_time=arrival,
+        )
+
+    def test_connection_with_transfer(self):
+        first = self.create_journey(
+            self.kyiv,
+            self.lviv,
+            self.at(8),
+            self.at(13),
+        )
+        second = self.create_journey(
+            self.lviv,
+            self.uzhhorod,
+            self.at(13, 30),
+            self.at(18),
+        )
+
+        res = self.client.get(
+            CONNECTIONS_URL,
+            {
+                "source": self.kyiv.id,
+                "destination": self.uzhhorod.id,
+                "departure": self.day,
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        itinerary = res.data[0]
+        self.assertEqual(
+            [leg["id"] for leg in itinerary["legs"]], [first.id, second.id]
+        )
+        self.assertEqual(itinerary["transfers"], 1)
+        self.assertEqual(itinerary["distance"], 600)
+        self.assertEqual(
+            itinerary["arrival_time"],
+            self.at(18).isoformat().replace("+00:00", "Z"),
+        )
+
+    def test_index_is_rebuilt_when_journeys_change(self):
+        params = {
+            "source": self.kyiv.id,
+            "destination": self.lviv.id,
+            "departure": self.day,
+        }
+        self.client.get(CONNECTIONS_URL, params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_journey(
+                self.kyiv,
+                self.lviv,
+                self.at(8),
+                self.at(13),
+            )
+        res = self.client.get(CONNECTIONS_URL, params)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_index_is_rebuilt_after_changes_in_other_processes(self):
+        params = {
+            "source": self.kyiv.id,
+            "destination": self.lviv.id,
+            "departure": self.day,
+        }
+        self.client.get(CONNECTIONS_URL, params)
+
+        # Another process saves a journey and bumps the shared counter
+        with self.captureOnCommitCallbacks():
+            self.create_journey(
+                self.kyiv,
+                self.lviv,
+                self.at(8),
+                self.at(13),
+            )
+        ResourceVersion.objects.filter(name="journey").update(
+            version=F("version") + 1
+        )
+        res = self.client.get(CONNECTIONS_URL, params)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_arrived_journeys_are_not_indexed(self):
+        self.create_journey(
+            self.kyiv,
+            self.lviv,
+            timezone.now() - timedelta(hours=8),
+            timezone.now() - timedelta(hours=3),
+        )
+        upcoming = self.create_journey(
+            self.kyiv, self.lviv, self.at(8), self.at(13)
+        )
+
+        index = ConnectionIndex.from_database()
+        res = self.client.get(
+            CONNECTIONS_URL,
+            {
+                "source": self.kyiv.id,
+                "destination": self.lviv.id,
+                "departure": timezone.now() - timedelta(days=1),
+            },
+        )
+
+        self.assertEqual(
+            [connection[4] for connection in index.connections], [upcoming.id]
+        )
+        self.assertEqual(
+            [itinerary["legs"][0]["id"] for itinerary in res.data],
+            [upcoming.id],
+        )
+
+    def test_source_and_destination_are_required(self):
+        res = self.client.get(CONNECTIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
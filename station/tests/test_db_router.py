@@ -0,0 +1,280 @@
+import os
+import tempfile
+from datetime import time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.cache import get_versions
+from station.db_router import (
+    PIN_COOKIE,
+    ReplicaRouter,
+    replicas_in_use,
+    reset_replicas,
+    use_replicas,
+)
+from station.models import (
+    Journey,
+    JourneySchedule,
+    ResourceVersion,
+    Station,
+)
+from station.tests.test_journey_api import sample_journey, sample_station
+from station.tests.test_order_api import tickets_payload
+
+REPLICAS = ["replica_1", "replica_2"]
+# A separate database standing in for a replica that lags behind
+LAGGING_REPLICA = "lagging_replica"
+
+JOURNEY_URL = reverse("journey:journey-list")
+JOURNEY_SEARCH_URL = reverse("journey:journey-search")
+ORDER_URL = reverse("journey:order-list")
+STATION_URL = reverse("journey:station-list")
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_opted_in_reads_use_a_replica(self):
+        token = use_replicas()
+        try:
+            self.assertIn(self.router.db_for_read(Station), REPLICAS)
+        finally:
+            reset_replicas(token)
+
+    def test_writes_and_migrations_use_primary(self):
+        token = use_replicas()
+        try:
+            self.assertEqual(self.router.db_for_write(Station), "default")
+        finally:
+            reset_replicas(token)
+
+        self.assertTrue(self.router.allow_migrate("default", "station"))
+        self.assertFalse(self.router.allow_migrate("replica_1", "station"))
+
+    def test_reads_in_transaction_use_primary(self):
+        token = use_replicas()
+        try:
+            with mock.patch.object(
+                connections["default"], "in_atomic_block", True
+            ):
+                self.assertEqual(self.router.db_for_read(Station), "default")
+        finally:
+            reset_replicas(token)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        token = use_replicas()
+        try:
+            self.assertIsNone(self.router.db_for_read(Station))
+        finally:
+            reset_replicas(token)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+        self.routed = []
+        patcher = mock.patch.object(
+            ReplicaRouter, "db_for_read", autospec=True, side_effect=self.read
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, router, model, **hints):
+        self.routed.append(replicas_in_use())
+        # The test database has no replica aliases
+        return None
+
+    def test_catalog_reads_use_replicas(self):
+        # Counters the replicas do not have yet are read from the primary
+        get_versions("station")
+        for url in [STATION_URL, JOURNEY_URL]:
+            self.routed.clear()
+
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(self.routed)
+            self.assertTrue(all(self.routed))
+        self.assertFalse(replicas_in_use())
+
+    def test_orders_use_primary(self):
+        self.client.get(ORDER_URL)
+
+        self.assertFalse(any(self.routed))
+
+    def test_reads_stick_to_primary_after_order(self):
+        res = self.client.post(
+            ORDER_URL, tickets_payload(self.journey, [(1, 1)]), format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.routed.clear()
+
+        self.client.get(JOURNEY_URL)
+
+        self.assertTrue(self.routed)
+        self.assertFalse(any(self.routed))
+        self.assertEqual(Journey.objects.get().tickets_sold, 1)
+
+    def test_pin_is_kept_by_the_client(self):
+        self.client.post(
+            ORDER_URL, tickets_payload(self.journey, [(1, 1)]), format="json"
+        )
+        # Another process, with nothing cached about the user
+        cache.clear()
+        self.routed.clear()
+
+        self.client.get(JOURNEY_URL)
+
+        self.assertFalse(any(self.routed))
+
+    def test_pin_is_not_shared_with_other_users(self):
+        self.client.post(
+            ORDER_URL, tickets_payload(self.journey, [(1, 1)]), format="json"
+        )
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("other@test.com", "pass")
+        )
+        self.routed.clear()
+
+        self.client.get(JOURNEY_URL)
+
+        self.assertTrue(all(self.routed))
+
+    def test_forged_pin_is_ignored(self):
+        self.client.cookies[PIN_COOKIE] = str(self.user.pk)
+
+        self.client.get(JOURNEY_URL)
+
+        self.assertTrue(all(self.routed))
+
+    def test_search_reads_primary_after_materializing(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            JourneySchedule.objects.create(
+                route=self.journey.route,
+                train=self.journey.train,
+                departure=time(8, 15),
+                duration=timedelta(hours=5),
+                valid_from=today,
+                valid_until=today + timedelta(days=365),
+            )
+        params = {
+            "source": self.journey.route.source_id,
+            "date_from": today.isoformat(),
+            "date_to": (today + timedelta(days=60)).isoformat(),
+        }
+        self.routed.clear()
+
+        res = self.client.get(JOURNEY_SEARCH_URL, params)
+
+        # The schedules are read from a replica, the new journeys not
+        self.assertTrue(self.routed[0])
+        self.assertFalse(self.routed[-1])
+        self.assertEqual(res.data["count"], 61)
+
+        self.routed.clear()
+        self.client.get(
+            JOURNEY_SEARCH_URL,
+            {"source": params["source"], "date_from": params["date_from"]},
+        )
+
+        self.assertTrue(all(self.routed))
+
+
+@override_settings(DATABASE_REPLICAS=[LAGGING_REPLICA])
+class LaggingReplicaTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Added here, the test runner checks the declared databases
+        # before any test class is set up
+        cls.databases = {DEFAULT_DB_ALIAS, LAGGING_REPLICA}
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings[LAGGING_REPLICA] = connections.configure_settings(
+            {
+                DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+                LAGGING_REPLICA: {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": os.path.join(cls.replica_dir.name, "db.sqlite3"),
+                },
+            }
+        )[LAGGING_REPLICA]
+        call_command("migrate", database=LAGGING_REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[LAGGING_REPLICA].close()
+        del connections[LAGGING_REPLICA]
+        del connections.settings[LAGGING_REPLICA]
+        cls.replica_dir.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+
+    def replicate(self, resource):
+        """Copies the primary's version counter to the replica"""
+        ResourceVersion.objects.get(name=resource).save(using=LAGGING_REPLICA)
+
+    def test_versions_are_read_with_the_replica_data(self):
+        get_versions("station")
+        self.replicate("station")
+        station = sample_station("Kyiv")
+
+        res = self.client.get(STATION_URL)
+
+        # Lagging data is validated by the counter the replica has
+        self.assertEqual(res.data["count"], 0)
+        etag = res["ETag"]
+
+        # Replication writes rows without running signals
+        Station.objects.using(LAGGING_REPLICA).bulk_create([station])
+        self.replicate("station")
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_new_counters_are_read_from_the_primary(self):
+        sample_station("Kyiv")
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.data["count"], 1)
+        self.assertFalse(
+            ResourceVersion.objects.using(LAGGING_REPLICA).exists()
+        )
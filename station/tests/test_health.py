@@ -0,0 +1,138 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from drf_spectacular.generators import SchemaGenerator
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.health import pool_stats, wait_for_database
+
+HEALTH_URL = reverse("journey:database-health")
+
+
+class DatabaseHealthTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_healthy_database(self):
+        res = self.client.get(HEALTH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, {"status": "ok", "databases": {"default": {"ok": True}}}
+        )
+
+    def test_unavailable_database(self):
+        with mock.patch.object(
+            connections["default"],
+            "cursor",
+            side_effect=OperationalError("connection refused"),
+        ), self.assertLogs("station.health", "ERROR") as logs:
+            res = self.client.get(HEALTH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data["databases"]["default"], {"ok": False})
+        self.assertIn("connection refused", logs.output[0])
+
+    def test_details_for_staff(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "admin@test.com", "testpass", is_staff=True
+            )
+        )
+        with mock.patch.object(
+            connections["default"],
+            "cursor",
+            side_effect=OperationalError("connection refused"),
+        ), self.assertLogs("station.health", "ERROR"):
+            res = self.client.get(HEALTH_URL)
+
+        self.assertIn("pool_mode", res.data)
+        self.assertEqual(
+            res.data["databases"]["default"],
+            {"ok": False, "error": "connection refused", "pool": None},
+        )
+
+    def test_schema_documents_the_response(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        responses = schema["paths"]["/api/station/health/db/"]["get"][
+            "responses"
+        ]
+        for code in ("200", "503"):
+            self.assertEqual(
+                responses[code]["content"]["application/json"]["schema"],
+                {"$ref": "#/components/schemas/DatabaseHealth"},
+            )
+
+    def test_pool_stats(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 4,
+            "pool_available": 1,
+            "requests_num": 120,
+            "requests_wait_ms": 35,
+        }
+
+        with mock.patch.object(
+            connections["default"], "pool", pool, create=True
+        ):
+            stats = pool_stats()
+
+        self.assertEqual(stats["in_use"], 3)
+        self.assertEqual(stats["checkouts"], 120)
+        self.assertEqual(stats["wait_ms"], 35)
+        self.assertEqual(stats["waiting"], 0)
+        self.assertEqual(stats["saturation"], 0.3)
+
+
+@mock.patch("station.health.time.sleep")
+class WaitForDatabaseTests(SimpleTestCase):
+    def test_retries_with_backoff(self, sleep):
+        results = [
+            {"ok": False, "error": "down"},
+            {"ok": False, "error": "down"},
+            {"ok": False, "error": "down"},
+            {"ok": True, "latency_ms": 1.0},
+        ]
+        with mock.patch("station.health.check_database", side_effect=results):
+            result = wait_for_database(interval=1, max_interval=3)
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [1, 2, 3]
+        )
+
+    def test_command_waits_for_database(self, sleep):
+        out = StringIO()
+        with mock.patch(
+            "station.health.check_database",
+            side_effect=[
+                {"ok": False, "error": "down"},
+                {"ok": True, "latency_ms": 1.0},
+            ],
+        ):
+            call_command("wait_for_db", stdout=out)
+
+        self.assertIn("Database unavailable (down)", out.getvalue())
+        self.assertIn("Database available!", out.getvalue())
+
+    def test_command_gives_up_after_timeout(self, sleep):
+        with mock.patch(
+            "station.health.check_database",
+            return_value={"ok": False, "error": "down"},
+        ), mock.patch(
+            "station.health.time.monotonic", side_effect=[0, 0.5, 2]
+        ):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "wait_for_db", "--timeout", "1", stdout=StringIO()
+                )
@@ -0,0 +1,314 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+JOURNEY_URL = reverse("journey:journey-list")
+ORDER_URL = reverse("journey:order-list")
+
+
+def sample_station(name="Kyiv", **params):
+    defaults = {"latitude": 50.45, "longitude": 30.52}
+    defaults.update(params)
+    return Station.objects.create(name=name, **defaults)
+
+
+def sample_train(**params):
+    train_type = TrainType.objects.create(name="Intercity")
+    defaults = {
+        "name": "Express",
+        "cargo_num": 3,
+        "place_in_cargo": 2,
+        "seats": 10,
+        "train_type": train_type,
+    }
+    defaults.update(params)
+    return Train.objects.create(**defaults)
+
+
+def sample_journey(**params):
+    route = Route.objects.create(
+        source=sample_station("Kyiv"),
+        destination=sample_station("Lviv"),
+        distance=540,
+    )
+    defaults = {
+        "route": route,
+        "departure_time": "2022-06-02 14:00:00+00:00",
+        "arrival_time": "2022-06-02 18:00:00+00:00",
+    }
+    defaults.update(params)
+    if "train" not in defaults:
+        defaults["train"] = sample_train()
+    return Journey.objects.create(**defaults)
+
+
+JOURNEY_SEARCH_URL = reverse("journey:journey-search")
+
+
+def journey_detail_url(journey_id):
+    return reverse("journey:journey-detail", args=[journey_id])
+
+
+class JourneySeatMapTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def test_order_marks_seats_taken(self):
+        payload = {
+            "tickets": [
+                {"cargo": 3, "seat": 2, "journey": self.journey.id},
+            ]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.taken_places, [(3, 2)])
+
+    def test_list_reads_availability_from_seat_map(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=2, seat=5, journey=self.journey, order=order
+        )
+
+        res = self.client.get(JOURNEY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 9)
+
+    def test_retrieve_taken_seats(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=2, seat=7, journey=self.journey, order=order
+        )
+        Ticket.objects.create(
+            cargo=1, seat=3, journey=self.journey, order=Order.objects.create(
+                user=self.user
+            )
+        )
+
+        res = self.client.get(journey_detail_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], [3, 7])
+
+    def test_deleting_ticket_releases_seat(self):
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            cargo=2, seat=5, journey=self.journey, order=order
+        )
+
+        ticket.delete()
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.taken_places, [])
+
+    def test_train_layout_change_rebuilds_seat_map(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=2, seat=5, journey=self.journey, order=order
+        )
+        train = self.journey.train
+        train.seats = 20
+        train.save()
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.taken_places, [(2, 5)])
+
+
+class JourneyTicketsSoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def test_order_and_delete_maintain_counter(self):
+        payload = {
+            "tickets": [
+                {"cargo": 1, "seat": 1, "journey": self.journey.id},
+                {"cargo": 1, "seat": 2, "journey": self.journey.id},
+            ]
+        }
+        self.client.post(ORDER_URL, payload, format="json")
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 2)
+
+        Ticket.objects.filter(seat=1).first().delete()
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+        self.assertEqual(self.journey.tickets_available, 9)
+
+    def test_moving_ticket_recounts_both_journeys(self):
+        other = sample_journey(train=self.journey.train)
+        ticket = Ticket.objects.create(
+            cargo=1,
+            seat=1,
+            journey=self.journey,
+            order=Order.objects.create(user=self.user),
+        )
+
+        ticket.journey = other
+        ticket.save()
+
+        self.journey.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 0)
+        self.assertEqual(other.tickets_sold, 1)
+
+    def test_reconcile_command_fixes_drift(self):
+        Ticket.objects.create(
+            cargo=1,
+            seat=1,
+            journey=self.journey,
+            order=Order.objects.create(user=self.user),
+        )
+        in_sync = sample_journey(train=self.journey.train)
+        Journey.objects.filter(pk=self.journey.pk).update(tickets_sold=7)
+
+        out = StringIO()
+        call_command("reconcile_tickets_sold", "--dry-run", stdout=out)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 7)
+        self.assertIn("1 journeys drifted", out.getvalue())
+
+        call_command("reconcile_tickets_sold", stdout=StringIO())
+
+        self.journey.refresh_from_db()
+        in_sync.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+        self.assertEqual(in_sync.tickets_sold, 0)
+
+
+class JourneySearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_station("Kyiv")
+        self.lviv = sample_station("Lviv")
+        self.odesa = sample_station("Odesa")
+        self.train = sample_train()
+        self.kyiv_lviv = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=540
+        )
+        self.kyiv_odesa = Route.objects.create(
+            source=self.kyiv, destination=self.odesa, distance=475
+        )
+
+    def create_journey(self, route, departure_time):
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time="2030-01-01 00:00:00+00:00",
+        )
+
+    def test_search_by_stations_and_dates(self):
+        expected = self.create_journey(
+            self.kyiv_lviv, "2024-05-02 23:30:00+00:00"
+        )
+        self.create_journey(self.kyiv_lviv, "2024-05-03 00:00:00+00:00")
+        self.create_journey(self.kyiv_odesa, "2024-05-02 10:00:00+00:00")
+
+        res = self.client.get(
+            JOURNEY_SEARCH_URL,
+            {
+                "source": self.kyiv.id,
+                "destination": self.lviv.id,
+                "date_from": "2024-05-01",
+                "date_to": "2024-05-02",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]], [expected.id]
+        )
+
+    def test_invalid_date_window(self):
+        res = self.client.get(
+            JOURNEY_SEARCH_URL,
+            {"date_from": "2024-05-02", "date_to": "2024-05-01"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_results_are_cached(self):
+        self.create_journey(self.kyiv_lviv, "2024-05-02 10:00:00+00:00")
+        params = {"source": self.kyiv.id}
+        self.client.get(JOURNEY_SEARCH_URL, params)
+
+        # Only the schedule and search version counters are read
+        with self.assertNumQueries(2):
+            res = self.client.get(JOURNEY_SEARCH_URL, params)
+
+        self.assertEqual(res.data["count"], 1)
+
+    def test_search_results_are_cached_per_scheme(self):
+        self.create_journey(self.kyiv_lviv, "2024-05-02 10:00:00+00:00")
+        self.create_journey(self.kyiv_odesa, "2024-05-03 10:00:00+00:00")
+        params = {"source": self.kyiv.id, "limit": 1}
+        self.client.get(JOURNEY_SEARCH_URL, params)
+
+        res = self.client.get(JOURNEY_SEARCH_URL, params, secure=True)
+
+        self.assertTrue(res.data["next"].startswith("https://"))
+
+    def test_new_journey_invalidates_cache(self):
+        self.create_journey(self.kyiv_lviv, "2024-05-02 10:00:00+00:00")
+        params = {"source": self.kyiv.id}
+        self.client.get(JOURNEY_SEARCH_URL, params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_journey(self.kyiv_odesa, "2024-05-03 10:00:00+00:00")
+        res = self.client.get(JOURNEY_SEARCH_URL, params)
+
+        self.assertEqual(res.data["count"], 2)
+
+    def test_booking_invalidates_cache(self):
+        journey = self.create_journey(
+            self.kyiv_lviv, "2024-05-02 10:00:00+00:00"
+        )
+        self.client.get(JOURNEY_SEARCH_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                ORDER_URL,
+                {"tickets": [{"cargo": 1, "seat": 1, "journey": journey.id}]},
+                format="json",
+            )
+        res = self.client.get(JOURNEY_SEARCH_URL)
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 9)
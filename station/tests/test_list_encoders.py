@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from station.models import Crew, Journey, Route, Train, TrainType
+from station.tests.test_journey_api import sample_station
+
+JOURNEY_URL = reverse("journey:journey-list")
+JOURNEY_SEARCH_URL = reverse("journey:journey-search")
+TRAIN_URL = reverse("journey:train-list")
+
+
+class FastListSerializerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+        kyiv = sample_station("Kyiv")
+        lviv = sample_station("Lviv")
+        routes = [
+            Route.objects.create(source=kyiv, destination=lviv, distance=540),
+            Route.objects.create(source=lviv, destination=kyiv, distance=545),
+        ]
+        crew = [
+            Crew.objects.create(first_name=f"First {number}", last_name="Last")
+            for number in range(3)
+        ]
+        self.train_types = [
+            TrainType.objects.create(name=name)
+            for name in ("Intercity", "Regional")
+        ]
+        self.trains = []
+        for number in range(4):
+            train = Train.objects.create(
+                name=f"Train {number}",
+                cargo_num=3,
+                place_in_cargo=2,
+                seats=10 + number,
+                train_type=self.train_types[number % 2],
+            )
+            # Added out of id order, both paths list crew by id
+            train.crew.add(*reversed(crew[: number % 3 + 1]))
+            self.trains.append(train)
+        Train.objects.filter(pk=self.trains[1].pk).update(
+            image="uploads/trains/train-1.jpg"
+        )
+
+        self.departure = timezone.now().replace(microsecond=0)
+        for number in range(7):
+            departure_time = self.departure + timedelta(hours=number % 3)
+            Journey.objects.create(
+                route=routes[number % 2],
+                train=self.trains[number % 4],
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=5),
+                tickets_sold=number,
+            )
+
+    def assertSameContent(self, url, params=None):
+        responses = []
+        for fast in (False, True):
+            for store in caches.all():
+                store.clear()
+            with override_settings(FAST_LIST_SERIALIZERS=fast):
+                responses.append(self.client.get(url, params))
+
+        slow, fast = responses
+        self.assertEqual(slow.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+
+        return fast
+
+    def test_journey_list(self):
+        res = self.assertSameContent(JOURNEY_URL, {"limit": 10})
+
+        self.assertEqual(res.json()["results"][0]["train_type"], "Intercity")
+        self.assertEqual(res.json()["results"][6]["tickets_available"], 6)
+
+        self.assertSameContent(JOURNEY_URL, {"limit": 3, "offset": 2})
+
+    def test_journey_list_cursor_pages(self):
+        res = self.assertSameContent(
+            JOURNEY_URL, {"cursor": "", "page_size": 3}
+        )
+
+        self.assertSameContent(res.json()["next"])
+
+    def test_journey_search(self):
+        self.assertSameContent(
+            JOURNEY_SEARCH_URL,
+            {
+                "source": Route.objects.first().source_id,
+                "date_from": self.departure.date().isoformat(),
+            },
+        )
+        self.assertSameContent(JOURNEY_SEARCH_URL, {"cursor": ""})
+
+    def test_train_list(self):
+        res = self.assertSameContent(TRAIN_URL, {"limit": 10})
+
+        self.assertEqual(
+            res.json()["results"][2]["crew"],
+            ["First 0 Last", "First 1 Last", "First 2 Last"],
+        )
+        self.assertSameContent(
+            TRAIN_URL,
+            {
+                "crew": str(Crew.objects.order_by("id").last().id),
+                "train_type": str(self.train_types[0].id),
+            },
+        )
+
+    def test_query_counts(self):
+        # Creates the version counters
+        self.client.get(TRAIN_URL)
+        caches["train_list"].clear()
+        with self.assertNumQueries(1):
+            self.client.get(JOURNEY_URL, {"cursor": ""})
+        with self.assertNumQueries(4):
+            self.client.get(TRAIN_URL)
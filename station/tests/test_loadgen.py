@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+from django.test import SimpleTestCase
+
+from station.loadgen import AsgiReplayer, ReplayStats, read_traces
+
+
+async def echo_application(scope, receive, send):
+    """ASGI app answering 201 for POST, 404 for /missing/ and 200 else"""
+    message = await receive()
+    status = 200
+    if scope["method"] == "POST":
+        status = 201 if json.loads(message["body"]) else 400
+    if scope["path"] == "/missing/":
+        status = 404
+    await send({"type": "http.response.start", "status": status})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+class ReadTracesTests(SimpleTestCase):
+    def test_skips_lines_that_are_not_traces(self):
+        traces = read_traces(
+            [
+                '{"method": "get", "path": "/api/station/station/"}\n',
+                "\n",
+                "not json\n",
+                '{"request_id": "user-001", "title": "Backlog entry"}\n',
+                '{"method": "POST", "path": "/api/station/order/", '
+                '"body": {"tickets": []}, "user": "test@test.com"}\n',
+            ]
+        )
+
+        self.assertEqual(
+            traces,
+            [
+                {
+                    "method": "GET",
+                    "path": "/api/station/station/",
+                    "body": None,
+                    "user": None,
+                },
+                {
+                    "method": "POST",
+                    "path": "/api/station/order/",
+                    "body": {"tickets": []},
+                    "user": "test@test.com",
+                },
+            ],
+        )
+
+
+class AsgiReplayerTests(SimpleTestCase):
+    def setUp(self):
+        self.traces = [
+            {"method": "GET", "path": "/a/?x=1", "body": None, "user": "u"},
+            {"method": "POST", "path": "/b/", "body": {"a": 1}, "user": None},
+            {"method": "GET", "path": "/missing/", "body": None, "user": None},
+        ]
+
+    def test_scope_carries_query_and_token(self):
+        replayer = AsgiReplayer(echo_application, tokens={"u": "token"})
+
+        scope = replayer.build_scope(self.traces[0])
+
+        self.assertEqual(scope["path"], "/a/")
+        self.assertEqual(scope["query_string"], b"x=1")
+        self.assertIn((b"authorization", b"Bearer token"), scope["headers"])
+
+    def test_max_throughput_mode(self):
+        replayer = AsgiReplayer(echo_application)
+
+        asyncio.run(replayer.max_throughput(self.traces, 9, concurrency=4))
+
+        summary = replayer.stats.summary()
+        self.assertEqual(summary["requests"], 9)
+        self.assertEqual(summary["statuses"], {"200": 3, "201": 3, "404": 3})
+        self.assertAlmostEqual(summary["error_rate"], 1 / 3, places=4)
+
+    def test_constant_rate_mode(self):
+        replayer = AsgiReplayer(echo_application)
+
+        asyncio.run(replayer.constant_rate(self.traces, 6, rate=200))
+
+        summary = replayer.stats.summary()
+        self.assertEqual(summary["requests"], 6)
+        self.assertGreaterEqual(summary["elapsed_s"], 5 / 200)
+
+
+class ReplayStatsTests(SimpleTestCase):
+    def test_histogram_and_percentiles(self):
+        stats = ReplayStats()
+        stats.started, stats.finished = 0.0, 2.0
+        for latency in (0.5, 3, 3, 40, 7000):
+            stats.record(200, latency)
+        stats.record_exception(12)
+
+        summary = stats.summary()
+
+        self.assertEqual(summary["throughput_rps"], 3.0)
+        self.assertEqual(summary["exceptions"], 1)
+        self.assertEqual(summary["latency_ms"]["p50"], 3)
+        histogram = {
+            bucket["le"]: bucket["count"] for bucket in summary["histogram_ms"]
+        }
+        self.assertEqual(histogram[1], 1)
+        self.assertEqual(histogram[5], 2)
+        self.assertEqual(histogram[25], 1)
+        self.assertEqual(histogram[50], 1)
+        self.assertEqual(histogram["+Inf"], 1)
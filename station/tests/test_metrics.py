@@ -0,0 +1,159 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.tests.test_journey_api import sample_journey
+from station.tests.test_order_api import tickets_payload
+from station.throttling import UserRateThrottle
+
+JOURNEY_SEARCH_URL = reverse("journey:journey-search")
+METRICS_URL = reverse("metrics")
+ORDER_URL = reverse("journey:order-list")
+STATION_URL = reverse("journey:station-list")
+
+
+def sample_value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(BOOKING_RETRY_BACKOFF=0)
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def test_booking_metrics(self):
+        bookings = sample_value("station_bookings_total")
+        tickets = sample_value("station_order_tickets_sum")
+        durations = sample_value("station_booking_transaction_seconds_count")
+        conflicts = sample_value("station_seat_conflicts_total")
+
+        self.client.post(
+            ORDER_URL,
+            tickets_payload(self.journey, [(1, 1), (1, 2)]),
+            format="json",
+        )
+        res = self.client.post(
+            ORDER_URL, tickets_payload(self.journey, [(1, 2)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(sample_value("station_bookings_total"), bookings + 1)
+        self.assertEqual(
+            sample_value("station_order_tickets_sum"), tickets + 2
+        )
+        self.assertEqual(
+            sample_value("station_booking_transaction_seconds_count"),
+            durations + 2,
+        )
+        self.assertEqual(
+            sample_value("station_seat_conflicts_total"), conflicts + 1
+        )
+
+    def test_search_cache_metrics(self):
+        labels = {"cache": "journey_search"}
+        hits = sample_value(
+            "station_cache_lookups_total", result="hit", **labels
+        )
+        misses = sample_value(
+            "station_cache_lookups_total", result="miss", **labels
+        )
+        searches = sample_value(
+            "station_journey_search_seconds_count", cache="hit"
+        )
+
+        self.client.get(JOURNEY_SEARCH_URL)
+        self.client.get(JOURNEY_SEARCH_URL)
+
+        self.assertEqual(
+            sample_value(
+                "station_cache_lookups_total", result="hit", **labels
+            ),
+            hits + 1,
+        )
+        self.assertEqual(
+            sample_value(
+                "station_cache_lookups_total", result="miss", **labels
+            ),
+            misses + 1,
+        )
+        self.assertEqual(
+            sample_value("station_journey_search_seconds_count", cache="hit"),
+            searches + 1,
+        )
+
+    def test_throttled_requests(self):
+        throttled = sample_value(
+            "station_throttled_requests_total", scope="user"
+        )
+
+        with mock.patch.object(
+            UserRateThrottle, "THROTTLE_RATES", {"user": "1/minute"}
+        ):
+            self.client.get(STATION_URL)
+            res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            sample_value("station_throttled_requests_total", scope="user"),
+            throttled + 1,
+        )
+
+    @override_settings(METRICS_TOKEN="scrape-token")
+    def test_metrics_endpoint(self):
+        self.client.get(JOURNEY_SEARCH_URL)
+
+        res = APIClient().get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer scrape-token"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"station_bookings_total", res.content)
+        self.assertIn(b"station_journey_search_seconds_bucket", res.content)
+
+    @override_settings(METRICS_TOKEN="scrape-token")
+    def test_metrics_endpoint_is_not_public(self):
+        anonymous = APIClient().get(METRICS_URL)
+        wrong_token = APIClient().get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer guessed-token"
+        )
+        user = APIClient()
+        user.force_login(self.user)
+        user = user.get(METRICS_URL)
+
+        for res in (anonymous, wrong_token, user):
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+            self.assertNotIn(b"station_bookings_total", res.content)
+
+    def test_metrics_endpoint_for_staff(self):
+        staff = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        client = APIClient()
+        client.force_login(staff)
+
+        res = client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"])
+    def test_metrics_endpoint_for_allowed_addresses(self):
+        allowed = APIClient().get(METRICS_URL, REMOTE_ADDR="10.0.0.5")
+        other = APIClient().get(METRICS_URL, REMOTE_ADDR="10.0.0.6")
+
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+        self.assertEqual(other.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,342 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    connection,
+    transaction,
+)
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.models import Journey, Order, Ticket
+from station.tests.test_journey_api import sample_journey, sample_train
+
+ORDER_URL = reverse("journey:order-list")
+
+
+def tickets_payload(journey, places):
+    return {
+        "tickets": [
+            {"cargo": cargo, "seat": seat, "journey": journey.id}
+            for cargo, seat in places
+        ]
+    }
+
+
+@override_settings(BOOKING_RETRY_BACKOFF=0)
+class OrderBookingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(
+            train=sample_train(cargo_num=4, seats=20)
+        )
+
+    def test_group_order_books_all_seats(self):
+        places = [(cargo, seat) for cargo in (1, 2) for seat in (1, 2, 3)]
+
+        res = self.client.post(
+            ORDER_URL, tickets_payload(self.journey, places), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 6)
+        self.assertEqual(Ticket.objects.count(), 6)
+        self.journey.refresh_from_db()
+        self.assertEqual(sorted(self.journey.taken_places), places)
+
+    def test_query_count_does_not_depend_on_ticket_count(self):
+        with CaptureQueriesContext(connection) as small_order:
+            self.client.post(
+                ORDER_URL,
+                tickets_payload(self.journey, [(1, 1), (1, 2)]),
+                format="json",
+            )
+        places = [(cargo, seat) for cargo in (2, 3) for seat in range(1, 21)]
+        with CaptureQueriesContext(connection) as large_order:
+            res = self.client.post(
+                ORDER_URL, tickets_payload(self.journey, places), format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(large_order), len(small_order))
+
+    def test_taken_seat_is_rejected(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            cargo=1, seat=5, journey=self.journey, order=order
+        )
+
+        res = self.client.post(
+            ORDER_URL,
+            tickets_payload(self.journey, [(1, 4), (1, 5)]),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["conflicts"],
+            [{"journey": self.journey.id, "cargo": 1, "seat": 5}],
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_ticket_seat_is_unique_per_journey(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            [Ticket(cargo=1, seat=5, journey=self.journey, order=order)]
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Ticket.objects.bulk_create(
+                [Ticket(cargo=1, seat=5, journey=self.journey, order=order)]
+            )
+
+    def test_unique_violation_is_retried(self):
+        with mock.patch(
+            "station.booking.book_tickets",
+            side_effect=[IntegrityError("UNIQUE constraint failed"), None],
+        ) as book_tickets:
+            res = self.client.post(
+                ORDER_URL,
+                tickets_payload(self.journey, [(1, 1)]),
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(book_tickets.call_count, 2)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_retries_are_bounded(self):
+        with mock.patch(
+            "station.booking.book_tickets",
+            side_effect=IntegrityError("UNIQUE constraint failed"),
+        ) as book_tickets:
+            res = self.client.post(
+                ORDER_URL,
+                tickets_payload(self.journey, [(1, 1)]),
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(book_tickets.call_count, 3)
+        self.assertFalse(Order.objects.exists())
+
+    def test_exhausted_deadlock_retries_are_not_seat_conflicts(self):
+        class DeadlockDetected(Exception):
+            sqlstate = "40P01"
+
+        error = OperationalError("deadlock detected")
+        error.__cause__ = DeadlockDetected()
+        with mock.patch(
+            "station.booking.book_tickets", side_effect=error
+        ) as book_tickets:
+            res = self.client.post(
+                ORDER_URL,
+                tickets_payload(self.journey, [(1, 1)]),
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertNotIn("conflicts", res.data)
+        self.assertEqual(book_tickets.call_count, 3)
+        self.assertFalse(Order.objects.exists())
+
+    def test_orders_cannot_be_changed_or_deleted(self):
+        res = self.client.post(
+            ORDER_URL, tickets_payload(self.journey, [(1, 1)]), format="json"
+        )
+        url = reverse("journey:order-detail", args=[res.data["id"]])
+
+        for method in ("put", "patch", "delete"):
+            with self.subTest(method=method):
+                res = getattr(self.client, method)(
+                    url, tickets_payload(self.journey, [(1, 2)]), format="json"
+                )
+                self.assertEqual(
+                    res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.taken_places, [(1, 1)])
+
+    def test_duplicate_seat_in_order_is_rejected(self):
+        res = self.client.post(
+            ORDER_URL,
+            tickets_payload(self.journey, [(2, 7), (2, 7)]),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_out_of_range_seat_is_rejected(self):
+        res = self.client.post(
+            ORDER_URL,
+            tickets_payload(self.journey, [(5, 1)]),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cargo", res.data["tickets"][0])
+
+    def test_unknown_journey_is_rejected(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": 999}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("journey", res.data["tickets"][0])
+        self.assertFalse(Journey.objects.filter(pk=999).exists())
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        for _ in range(6):
+            order = Order.objects.create(user=self.user)
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    cargo=1, seat=seat, journey=sample_journey(), order=order
+                )
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        with self.assertNumQueries(3):
+            small_page = self.client.get(ORDER_URL, {"page_size": 1})
+        with self.assertNumQueries(3):
+            large_page = self.client.get(ORDER_URL, {"page_size": 6})
+
+        self.assertEqual(len(small_page.data["results"]), 1)
+        self.assertEqual(len(large_page.data["results"]), 6)
+
+    def test_list_renders_journey_details(self):
+        res = self.client.get(ORDER_URL)
+
+        journey = res.data["results"][0]["tickets"][0]["journey"]
+        self.assertEqual(journey["route_distance"], 540)
+        self.assertEqual(journey["train_name"], "Express")
+        self.assertEqual(journey["train_type"], "Intercity")
+        self.assertEqual(journey["tickets_available"], 9)
+
+
+ORDER_EXPORT_URL = reverse("journey:order-export")
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin@test.com",
+            "testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.admin)
+        self.journey = sample_journey()
+
+        self.orders = []
+        for day, seats in [(1, (1, 2)), (2, (3,)), (3, (4,))]:
+            order = Order.objects.create(user=self.admin)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=f"2024-05-0{day} 12:00:00+00:00"
+            )
+            for seat in seats:
+                Ticket.objects.create(
+                    cargo=1, seat=seat, journey=self.journey, order=order
+                )
+            self.orders.append(order)
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_requires_admin(self):
+        user = get_user_model().objects.create_user("test@test.com", "x")
+        self.client.force_authenticate(user)
+
+        res = self.client.get(ORDER_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_csv_export(self):
+        res = self.client.get(ORDER_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(self.read(res))))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["order_id"], str(self.orders[0].id))
+        self.assertEqual(rows[0]["source"], "Kyiv")
+        self.assertEqual(rows[0]["destination"], "Lviv")
+        self.assertEqual(rows[0]["train_type"], "Intercity")
+        self.assertEqual(
+            rows[0]["order_created_at"], "2024-05-01T12:00:00+00:00"
+        )
+
+    def test_ndjson_export_filtered_by_date(self):
+        res = self.client.get(
+            ORDER_EXPORT_URL,
+            {
+                "file_format": "ndjson",
+                "date_from": "2024-05-02",
+                "date_to": "2024-05-02",
+            },
+        )
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.read(res).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["order_id"], self.orders[1].id)
+        self.assertEqual(rows[0]["seat"], 3)
+        self.assertEqual(rows[0]["user_email"], "admin@test.com")
+
+    def test_invalid_date_window(self):
+        res = self.client.get(
+            ORDER_EXPORT_URL,
+            {"date_from": "2024-05-03", "date_to": "2024-05-01"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        token = AccessToken.for_user(self.admin)
+
+        res = await self.async_client.get(
+            ORDER_EXPORT_URL, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertTrue(res.is_async)
+        content = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(len(content.decode().splitlines()), 5)
+
+    def test_export_command(self):
+        out = io.StringIO()
+
+        call_command(
+            "export_orders", "--date-from", "2024-05-03", stdout=out
+        )
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(
+            [row["order_id"] for row in rows], [str(self.orders[2].id)]
+        )
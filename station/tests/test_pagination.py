@@ -0,0 +1,155 @@
+import json
+from base64 import b64encode
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.models import Journey, Order, Ticket
+from station.tests.test_journey_api import sample_journey
+
+JOURNEY_URL = reverse("journey:journey-list")
+ORDER_URL = reverse("journey:order-list")
+TICKET_URL = reverse("journey:ticket-list")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        first = sample_journey()
+        start = datetime(2022, 6, 2, 8, tzinfo=timezone.utc)
+        for hours in [5, 1, 5, 3, 1, 5, 2]:
+            departure_time = start + timedelta(hours=hours)
+            Journey.objects.create(
+                route=first.route,
+                train=first.train,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=4),
+            )
+        self.journey_ids = list(
+            Journey.objects.order_by("departure_time", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def walk(self, url, params, link="next"):
+        ids = []
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            ids.append([item["id"] for item in res.data["results"]])
+            url, params = res.data[link], None
+
+        return ids
+
+    def test_journey_pages_follow_departure_time_and_id(self):
+        pages = self.walk(JOURNEY_URL, {"cursor": "", "page_size": 3})
+
+        self.assertEqual(
+            pages,
+            [
+                self.journey_ids[:3],
+                self.journey_ids[3:6],
+                self.journey_ids[6:],
+            ],
+        )
+
+    def test_previous_links_walk_back(self):
+        res = self.client.get(JOURNEY_URL, {"cursor": "", "page_size": 3})
+        res = self.client.get(res.data["next"])
+        res = self.client.get(res.data["next"])
+        self.assertIsNone(res.data["next"])
+
+        pages = self.walk(res.data["previous"], None, link="previous")
+
+        self.assertEqual(
+            pages, [self.journey_ids[3:6], self.journey_ids[:3]]
+        )
+
+    def test_page_runs_no_count_or_offset(self):
+        res = self.client.get(JOURNEY_URL, {"cursor": "", "page_size": 3})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(res.data["next"])
+
+        page_sql = queries[0]["sql"].upper()
+        self.assertNotIn("OFFSET", page_sql)
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries)
+        )
+
+    def test_invalid_cursor(self):
+        res = self.client.get(JOURNEY_URL, {"cursor": "garbage"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_null_or_nested_position(self):
+        for position in ([None, 1], [[1], 1], [{"id": 1}, 1]):
+            cursor = b64encode(json.dumps({"p": position}).encode())
+            res = self.client.get(JOURNEY_URL, {"cursor": cursor.decode()})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_offset_pagination_without_cursor(self):
+        res = self.client.get(JOURNEY_URL, {"limit": 2, "offset": 2})
+
+        self.assertEqual(res.data["count"], len(self.journey_ids))
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_orders_newest_first(self):
+        orders = [Order.objects.create(user=self.user) for _ in range(4)]
+        Order.objects.filter(pk=orders[0].pk).update(
+            created_at=orders[3].created_at + timedelta(hours=1)
+        )
+        Order.objects.create(
+            user=get_user_model().objects.create_user("other@test.com", "x")
+        )
+        expected = list(
+            Order.objects.filter(user=self.user)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+        pages = self.walk(ORDER_URL, {"cursor": "", "page_size": 3})
+
+        self.assertEqual(pages, [expected[:3], expected[3:]])
+        self.assertEqual(pages[0][0], orders[0].id)
+
+    def test_orders_page_numbers_without_cursor(self):
+        for _ in range(6):
+            Order.objects.create(user=self.user)
+
+        res = self.client.get(ORDER_URL, {"page": 2})
+
+        self.assertEqual(res.data["count"], 6)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_tickets_by_id(self):
+        order = Order.objects.create(user=self.user)
+        journey = Journey.objects.get(pk=self.journey_ids[0])
+        for seat in [4, 1, 3]:
+            Ticket.objects.create(
+                cargo=1, seat=seat, journey=journey, order=order
+            )
+        expected = list(
+            Ticket.objects.order_by("id").values_list("id", flat=True)
+        )
+
+        pages = self.walk(TICKET_URL, {"cursor": "", "page_size": 2})
+
+        self.assertEqual(pages, [expected[:2], expected[2:]])
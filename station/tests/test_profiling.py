@@ -0,0 +1,92 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from station.models import Station
+from station.profiling import (
+    QueryProfile,
+    QueryProfilerMiddleware,
+    fingerprint,
+    profile_queries,
+)
+from station.tests.test_journey_api import sample_station
+
+STATION_URL = reverse("journey:station-list")
+
+
+class QueryProfileTests(TestCase):
+    def test_fingerprint_replaces_literals_and_lists(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t WHERE id IN (%s, %s,%s) "
+                "AND name = 'O''Neil'  LIMIT 21"
+            ),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+    def test_records_queries_and_repeats(self):
+        stations = [sample_station(f"Station {number}") for number in range(3)]
+        profile = QueryProfile()
+
+        with profile_queries(profile):
+            list(Station.objects.all())
+            for station in stations:
+                Station.objects.get(pk=station.pk)
+
+        self.assertEqual(profile.count, 4)
+        self.assertEqual(profile.repeated, 2)
+        self.assertGreater(profile.seconds, 0)
+        (sql, (count, _)), _ = profile.top(2)
+        self.assertEqual(count, 3)
+        self.assertIn("WHERE", sql)
+
+
+@override_settings(QUERY_PROFILER_SAMPLE_RATE=1)
+class QueryProfilerMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+        sample_station()
+
+    def test_server_timing_header(self):
+        # Creates the version counters, which are read again after that
+        self.client.get(STATION_URL)
+        res = self.client.get(STATION_URL)
+
+        self.assertRegex(
+            res["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", '
+            r'db-repeated;desc="0 repeated"$',
+        )
+
+    @override_settings(QUERY_PROFILER_SLOW_MS=0)
+    def test_slow_request_is_logged(self):
+        with self.assertLogs("station.slow_requests", "WARNING") as logs:
+            self.client.get(STATION_URL)
+
+        self.assertIn(f"Slow request GET {STATION_URL}", logs.output[0])
+        self.assertIn("station_station", logs.output[0])
+
+    @override_settings(QUERY_PROFILER_SAMPLE_RATE=0)
+    def test_disabled_middleware_is_removed(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryProfilerMiddleware(lambda request: HttpResponse())
+
+        self.assertNotIn("Server-Timing", APIClient().get(STATION_URL))
+
+    def test_async_requests(self):
+        async def view(request):
+            await sync_to_async(list)(Station.objects.all())
+            return HttpResponse()
+
+        middleware = QueryProfilerMiddleware(view)
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
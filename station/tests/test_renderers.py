@@ -0,0 +1,116 @@
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from station.parsers import ORJSONParser
+from station.renderers import ORJSONRenderer
+from station.tests.test_journey_api import sample_journey
+from station.tests.test_order_api import tickets_payload
+
+ORDER_URL = reverse("journey:order-list")
+
+DATA = {
+    "count": 2,
+    "next": None,
+    "results": [
+        {"id": 1, "name": "Київ — Львів", "price": 12.5, "paid": True},
+        {"id": 2, "name": 'quote " and \\', "price": 0.1, "paid": False},
+    ],
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_matches_json_renderer(self):
+        self.assertEqual(
+            ORJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
+
+    def test_native_and_fallback_types(self):
+        rendered = ORJSONRenderer().render(
+            {
+                "departure_time": datetime(
+                    2022, 6, 2, 14, tzinfo=timezone.utc
+                ),
+                "price": Decimal("12.50"),
+                "label": gettext_lazy("Journey"),
+                1: "non-string key",
+            }
+        )
+
+        self.assertEqual(
+            rendered,
+            b'{"departure_time":"2022-06-02T14:00:00Z","price":12.5,'
+            b'"label":"Journey","1":"non-string key"}',
+        )
+
+    def test_line_separators_are_escaped(self):
+        data = {"name": "line\u2028paragraph\u2029"}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_indent_falls_back_to_json_renderer(self):
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            ORJSONRenderer().render(DATA, media_type),
+            JSONRenderer().render(DATA, media_type),
+        )
+
+    @mock.patch("station.renderers.orjson", None)
+    def test_without_orjson(self):
+        self.assertEqual(
+            ORJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, body, parser=ORJSONParser):
+        return parser().parse(io.BytesIO(body), parser_context={})
+
+    def test_parses_like_json_parser(self):
+        body = JSONRenderer().render(DATA)
+
+        self.assertEqual(self.parse(body), self.parse(body, JSONParser))
+
+    def test_invalid_json(self):
+        for body in (b'{"tickets": [', b'{"price": NaN}'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                self.parse(body)
+
+    @mock.patch("station.parsers.orjson", None)
+    def test_without_orjson(self):
+        self.assertEqual(self.parse(b'{"id": 1}'), {"id": 1})
+
+
+class ORJSONResponseTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+        self.journey = sample_journey()
+
+    def test_order_history(self):
+        res = self.client.post(
+            ORDER_URL,
+            tickets_payload(self.journey, [(1, 1), (1, 2)]),
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
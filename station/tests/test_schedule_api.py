@@ -0,0 +1,212 @@
+from datetime import time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.models import Journey, JourneySchedule, Order, Ticket
+from station.tests.test_journey_api import sample_journey
+
+JOURNEY_SEARCH_URL = reverse("journey:journey-search")
+SCHEDULE_URL = reverse("journey:journey_schedule-list")
+
+
+def schedule_journey_url(schedule_id):
+    return reverse("journey:journey_schedule-journey", args=[schedule_id])
+
+
+@override_settings(JOURNEY_SCHEDULE_HORIZON_DAYS=6)
+class JourneyScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        journey = sample_journey()
+        self.route, self.train = journey.route, journey.train
+        journey.delete()
+        self.today = timezone.localdate()
+
+    def sample_schedule(self, **params):
+        defaults = {
+            "route": self.route,
+            "train": self.train,
+            "departure": time(8, 15),
+            "duration": timedelta(hours=5),
+            "valid_from": self.today,
+            "valid_until": self.today + timedelta(days=365),
+        }
+        defaults.update(params)
+        return JourneySchedule.objects.create(**defaults)
+
+    def test_new_schedule_materializes_up_to_horizon(self):
+        schedule = self.sample_schedule()
+
+        journeys = list(schedule.journeys.order_by("departure_time"))
+        self.assertEqual(len(journeys), 7)
+        self.assertEqual(
+            journeys[0].departure_time.timetz(),
+            time(8, 15, tzinfo=journeys[0].departure_time.tzinfo),
+        )
+        self.assertEqual(
+            journeys[0].arrival_time - journeys[0].departure_time,
+            timedelta(hours=5),
+        )
+        schedule.refresh_from_db()
+        self.assertEqual(
+            schedule.materialized_until, self.today + timedelta(days=6)
+        )
+
+    def test_only_scheduled_weekdays_are_materialized(self):
+        weekday = str(self.today.isoweekday())
+
+        schedule = self.sample_schedule(weekdays=weekday)
+
+        self.assertEqual(
+            list(
+                schedule.journeys.values_list(
+                    "departure_time__date", flat=True
+                )
+            ),
+            [self.today],
+        )
+
+    def test_search_beyond_horizon_materializes_lazily(self):
+        schedule = self.sample_schedule()
+        date = (self.today + timedelta(days=100)).isoformat()
+        params = {
+            "source": self.route.source_id,
+            "date_from": date,
+            "date_to": date,
+        }
+
+        res = self.client.get(JOURNEY_SEARCH_URL, params)
+
+        # Only the searched date, the horizon is left to extend_schedules
+        self.assertEqual(res.data["count"], 1)
+        schedule.refresh_from_db()
+        self.assertEqual(
+            schedule.materialized_until, self.today + timedelta(days=6)
+        )
+        self.assertEqual(schedule.journeys.count(), 8)
+
+        cache.clear()
+        res = self.client.get(JOURNEY_SEARCH_URL, params)
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(schedule.journeys.count(), 8)
+
+    def test_search_without_station_creates_no_journeys(self):
+        schedule = self.sample_schedule()
+        date = (self.today + timedelta(days=100)).isoformat()
+
+        res = self.client.get(
+            JOURNEY_SEARCH_URL, {"date_from": date, "date_to": date}
+        )
+
+        self.assertEqual(res.data["count"], 0)
+        self.assertEqual(schedule.journeys.count(), 7)
+
+    def test_extend_schedules_after_lazy_journeys(self):
+        schedule = self.sample_schedule()
+        date = (self.today + timedelta(days=10)).isoformat()
+        params = {"source": self.route.source_id, "date_from": date}
+        self.client.get(JOURNEY_SEARCH_URL, {**params, "date_to": date})
+
+        call_command("extend_schedules", "--days", "20", stdout=StringIO())
+
+        self.assertEqual(schedule.journeys.count(), 21)
+
+    def test_schedule_journey_for_booking(self):
+        schedule = self.sample_schedule(
+            valid_until=self.today + timedelta(days=1000)
+        )
+        date = self.today + timedelta(days=900)
+
+        res = self.client.get(
+            schedule_journey_url(schedule.id), {"date": date.isoformat()}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        journey = Journey.objects.get(pk=res.data["id"])
+        self.assertEqual(journey.schedule, schedule)
+        self.assertEqual(journey.departure_time.date(), date)
+        res = self.client.get(
+            schedule_journey_url(schedule.id), {"date": date.isoformat()}
+        )
+        self.assertEqual(res.data["id"], journey.id)
+
+    def test_schedule_journey_outside_schedule(self):
+        schedule = self.sample_schedule()
+
+        for date in [
+            self.today - timedelta(days=1),
+            self.today + timedelta(days=366),
+        ]:
+            res = self.client.get(
+                schedule_journey_url(schedule.id), {"date": date.isoformat()}
+            )
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_extend_schedules_rolls_horizon_forward(self):
+        schedule = self.sample_schedule()
+        out = StringIO()
+
+        call_command(
+            "extend_schedules", "--days", "20", "--batch-size", "1", stdout=out
+        )
+
+        self.assertIn(
+            "Materialized 14 journeys of 1 schedules", out.getvalue()
+        )
+        self.assertEqual(schedule.journeys.count(), 21)
+
+    def test_changed_schedule_keeps_sold_journeys(self):
+        schedule = self.sample_schedule(
+            valid_from=self.today + timedelta(days=1)
+        )
+        sold = schedule.journeys.order_by("departure_time").last()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(cargo=1, seat=1, journey=sold, order=order)
+
+        schedule.departure = time(9, 30)
+        schedule.save()
+
+        journeys = schedule.journeys.order_by("departure_time")
+        self.assertEqual(journeys.count(), 7)
+        self.assertTrue(journeys.filter(pk=sold.pk).exists())
+        self.assertEqual(
+            journeys.exclude(pk=sold.pk)
+            .filter(departure_time__hour=9, departure_time__minute=30)
+            .count(),
+            6,
+        )
+
+    def test_invalid_weekdays(self):
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+        payload = {
+            "route": self.route.id,
+            "train": self.train.id,
+            "weekdays": "118",
+            "departure": "08:15",
+            "duration": "05:00:00",
+            "valid_from": self.today.isoformat(),
+            "valid_until": self.today.isoformat(),
+        }
+
+        res = self.client.post(SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weekdays", res.data)
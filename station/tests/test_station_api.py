@@ -0,0 +1,210 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.cache import bump_version
+from station.geo import StationIndex, haversine
+from station.models import Crew, ResourceVersion
+from station.tests.test_journey_api import sample_station, sample_train
+
+NEARBY_URL = reverse("journey:station-nearby")
+STATION_URL = reverse("journey:station-list")
+TRAIN_URL = reverse("journey:train-list")
+
+
+class StationIndexTests(SimpleTestCase):
+    def setUp(self):
+        generator = random.Random(42)
+        self.stations = [
+            {
+                "id": station_id,
+                "name": f"Station {station_id}",
+                "latitude": generator.uniform(-80, 80),
+                "longitude": generator.uniform(-180, 180),
+            }
+            for station_id in range(500)
+        ]
+        self.index = StationIndex(self.stations)
+
+    def brute_force(self, latitude, longitude):
+        return sorted(
+            self.stations,
+            key=lambda station: haversine(
+                latitude, longitude, station["latitude"], station["longitude"]
+            ),
+        )
+
+    def test_nearest_matches_brute_force(self):
+        for latitude, longitude in [(50.45, 30.52), (-33.9, 151.2), (0, 179.9)]:
+            expected = [
+                station["id"]
+                for station in self.brute_force(latitude, longitude)[:7]
+            ]
+            found = [
+                station["id"]
+                for station in self.index.nearest(latitude, longitude, 7)
+            ]
+
+            self.assertEqual(found, expected)
+
+    def test_within_matches_brute_force(self):
+        expected = {
+            station["id"]
+            for station in self.stations
+            if haversine(
+                48.0, 10.0, station["latitude"], station["longitude"]
+            ) <= 2000
+        }
+        found = {
+            station["id"] for station in self.index.within(48.0, 10.0, 2000)
+        }
+
+        self.assertEqual(found, expected)
+
+    def test_empty_index(self):
+        index = StationIndex([])
+
+        self.assertEqual(index.nearest(0, 0, 3), [])
+        self.assertEqual(index.within(0, 0, 100), [])
+
+
+class NearbyStationApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_station("Kyiv", latitude=50.45, longitude=30.52)
+        self.lviv = sample_station("Lviv", latitude=49.84, longitude=24.03)
+        self.odesa = sample_station("Odesa", latitude=46.48, longitude=30.72)
+
+    def test_nearest_stations(self):
+        res = self.client.get(
+            NEARBY_URL, {"latitude": 50.0, "longitude": 30.0, "limit": 2}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["name"] for station in res.data], ["Kyiv", "Odesa"]
+        )
+        self.assertLess(res.data[0]["distance"], res.data[1]["distance"])
+
+    def test_stations_within_radius(self):
+        res = self.client.get(
+            NEARBY_URL, {"latitude": 50.0, "longitude": 25.0, "radius": 100}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([station["name"] for station in res.data], ["Lviv"])
+
+    def test_new_station_rebuilds_index(self):
+        self.client.get(NEARBY_URL, {"latitude": 48.62, "longitude": 22.29})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_station("Uzhhorod", latitude=48.62, longitude=22.29)
+        res = self.client.get(
+            NEARBY_URL, {"latitude": 48.62, "longitude": 22.29}
+        )
+
+        self.assertEqual(res.data[0]["name"], "Uzhhorod")
+
+    def test_index_is_rebuilt_after_changes_in_other_processes(self):
+        self.client.get(NEARBY_URL, {"latitude": 48.62, "longitude": 22.29})
+
+        # Another process saves a station and bumps the shared counter
+        with self.captureOnCommitCallbacks():
+            sample_station("Uzhhorod", latitude=48.62, longitude=22.29)
+        ResourceVersion.objects.filter(name="station").update(
+            version=F("version") + 1
+        )
+        res = self.client.get(
+            NEARBY_URL, {"latitude": 48.62, "longitude": 22.29}
+        )
+
+        self.assertEqual(res.data[0]["name"], "Uzhhorod")
+
+    def test_coordinates_are_required(self):
+        res = self.client.get(NEARBY_URL, {"latitude": 95})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        sample_station("Kyiv")
+
+    def test_list_sets_validators(self):
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", res)
+        self.assertIn("Last-Modified", res)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        # Only the shared version counters are read
+        with self.assertNumQueries(1):
+            res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(STATION_URL)["Last-Modified"]
+
+        res = self.client.get(
+            STATION_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_change_invalidates_etag(self):
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_station("Lviv")
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2)
+
+    def test_validators_are_shared_by_processes(self):
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        # Another process has an empty cache of its own
+        cache.clear()
+        self.assertEqual(self.client.get(STATION_URL)["ETag"], etag)
+
+        # and sees changes made through other processes
+        bump_version("station")
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_train_crew_change_invalidates_etag(self):
+        train = sample_train()
+        etag = self.client.get(TRAIN_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            train.crew.add(Crew.objects.create(first_name="A", last_name="B"))
+        res = self.client.get(TRAIN_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from station.models import Journey, Route, Station
+from station.tests.test_journey_api import sample_station, sample_train
+
+CSV_HEADER = (
+    "source,destination,train,departure_time,arrival_time,distance,"
+    "destination_latitude,destination_longitude\n"
+)
+
+
+class LoadTimetableTests(TestCase):
+    def setUp(self):
+        self.kyiv = sample_station("Kyiv")
+        self.lviv = sample_station("Lviv", latitude=49.84, longitude=24.03)
+        self.route = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=540
+        )
+        self.train = sample_train(name="Express")
+
+    def write_file(self, content, suffix=".csv"):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as timetable_file:
+            timetable_file.write(content)
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def load(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("load_timetable", path, *args, stdout=out, stderr=err)
+
+        return out.getvalue(), err.getvalue()
+
+    def test_creates_stations_routes_and_journeys(self):
+        path = self.write_file(
+            CSV_HEADER
+            + "Kyiv,Lviv,Express,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T13:00:00+00:00,,,\n"
+            "Kyiv,Odesa,Express,2024-05-01T09:00:00+00:00,"
+            "2024-05-01T15:00:00+00:00,475,46.48,30.72\n"
+            "Kyiv,Odesa,Express,2024-05-02T09:00:00+00:00,"
+            "2024-05-02T15:00:00+00:00,,,\n"
+        )
+
+        out, err = self.load(path)
+
+        self.assertEqual(err, "")
+        self.assertIn("3 rows", out)
+        odesa = Station.objects.get(name="Odesa")
+        self.assertEqual(odesa.latitude, 46.48)
+        route = Route.objects.get(source=self.kyiv, destination=odesa)
+        self.assertEqual(route.distance, 475)
+        self.assertEqual(Journey.objects.filter(route=route).count(), 2)
+        self.assertEqual(Journey.objects.filter(route=self.route).count(), 1)
+
+    def test_reload_updates_changed_journeys_only(self):
+        path = self.write_file(
+            CSV_HEADER
+            + "Kyiv,Lviv,Express,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T13:00:00+00:00,,,\n"
+            "Kyiv,Lviv,Express,2024-05-02T08:00:00+00:00,"
+            "2024-05-02T13:00:00+00:00,,,\n"
+        )
+        self.load(path)
+        path = self.write_file(
+            CSV_HEADER
+            + "Kyiv,Lviv,Express,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T13:00:00+00:00,,,\n"
+            "Kyiv,Lviv,Express,2024-05-02T08:00:00+00:00,"
+            "2024-05-02T14:30:00+00:00,,,\n"
+        )
+
+        out, _ = self.load(path)
+
+        self.assertIn("journeys updated: 1", out)
+        self.assertIn("journeys unchanged: 1", out)
+        self.assertEqual(Journey.objects.count(), 2)
+        self.assertEqual(
+            Journey.objects.get(departure_time__day=2).arrival_time.hour, 14
+        )
+
+    def test_dry_run_prints_diff_without_writing(self):
+        path = self.write_file(
+            json.dumps(
+                {
+                    "source": "Kyiv",
+                    "destination": "Odesa",
+                    "train": "Express",
+                    "departure_time": "2024-05-01T09:00:00+00:00",
+                    "arrival_time": "2024-05-01T15:00:00+00:00",
+                    "distance": 475,
+                    "destination_latitude": 46.48,
+                    "destination_longitude": 30.72,
+                }
+            )
+            + "\n",
+            suffix=".jsonl",
+        )
+
+        out, _ = self.load(path, "--dry-run")
+
+        self.assertIn("+ station Odesa", out)
+        self.assertIn("+ route Kyiv -> Odesa (475 km)", out)
+        self.assertIn("+ journey Kyiv -> Odesa Express", out)
+        self.assertIn("Dry run", out)
+        self.assertFalse(Station.objects.filter(name="Odesa").exists())
+        self.assertEqual(Journey.objects.count(), 0)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        path = self.write_file(
+            CSV_HEADER
+            + "Kyiv,Lviv,Unknown,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T13:00:00+00:00,,,\n"
+            "Kyiv,Lviv,Express,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T07:00:00+00:00,,,\n"
+            "Kyiv,Odesa,Express,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T13:00:00+00:00,,,\n"
+            "Kyiv,Lviv,Express,2024-05-01T08:00:00+00:00,"
+            "2024-05-01T13:00:00+00:00,,,\n"
+        )
+
+        out, err = self.load(path)
+
+        self.assertIn("line 2: unknown train 'Unknown'", err)
+        self.assertIn("line 3: arrival_time must be after", err)
+        self.assertIn("line 4: unknown station 'Odesa'", err)
+        self.assertIn("errors: 3", out)
+        self.assertEqual(Journey.objects.count(), 1)
+
+    def test_query_count_does_not_depend_on_row_count(self):
+        rows = "".join(
+            f"Kyiv,Lviv,Express,2024-05-01T{hour:02}:00:00+00:00,"
+            f"2024-05-02T{hour:02}:00:00+00:00,,,\n"
+            for hour in range(24)
+        )
+        path = self.write_file(CSV_HEADER + rows)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.load(path, "--batch-size", "1000")
+
+        self.assertLess(len(queries), 15)
+        self.assertEqual(Journey.objects.count(), 24)
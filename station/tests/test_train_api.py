@@ -1,14 +1,23 @@
 import tempfile
 import os
+from io import BytesIO
+from unittest import mock
 
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from station.images import (
+    build_derivative,
+    derivative_name,
+    generate_derivative,
+)
 from station.models import Train, Journey, Route, TrainType, Crew
 from station.serializers import TrainListSerializer, TrainRetrieveSerializer
 
@@ -65,6 +74,7 @@ class UnauthenticatedTrainApiTests(TestCase):
 
 class AuthenticatedTrainApiTests(TestCase):
     def setUp(self):
+        caches["train_list"].clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "test@test.com",
@@ -231,3 +241,254 @@ class TrainImageUploadTests(TestCase):
         res = self.client.delete(url)
 
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class TrainListCacheTests(TestCase):
+    def setUp(self):
+        # The default cache holds the throttle history
+        for store in caches.all():
+            store.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+        self.crew = [
+            Crew.objects.create(first_name=name, last_name="Driver")
+            for name in ("Ivan", "Petro")
+        ]
+        self.trains = [
+            sample_train(name=f"Train {number}") for number in range(3)
+        ]
+        for train in self.trains:
+            train.crew.add(*self.crew)
+
+    def test_filters_are_normalized(self):
+        crew = [str(member.id) for member in self.crew]
+        first = self.client.get(
+            TRAIN_URL, {"crew": ",".join(crew), "limit": 2}
+        )
+
+        # Only the shared version counters are read
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                TRAIN_URL,
+                {"crew": ",".join([*reversed(crew), crew[0]]), "limit": 2},
+            )
+
+        self.assertEqual(res.data["results"], first.data["results"])
+        self.assertEqual(res.data["count"], 3)
+        self.assertIn(
+            f"crew={crew[1]}%2C{crew[0]}%2C{crew[0]}", res.data["next"]
+        )
+
+    def test_pages_are_cached_per_scheme(self):
+        Train.objects.filter(pk=self.trains[0].pk).update(
+            image="uploads/trains/train-0.jpg"
+        )
+        self.client.get(TRAIN_URL)
+
+        res = self.client.get(TRAIN_URL, secure=True)
+
+        images = res.data["results"][0]["images"]
+        self.assertTrue(images["thumbnail"]["webp"].startswith("https://"))
+
+    def test_pages_are_cached_per_list_serializer(self):
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            self.client.get(TRAIN_URL)
+
+        with override_settings(FAST_LIST_SERIALIZERS=True):
+            with self.assertNumQueries(4):
+                self.client.get(TRAIN_URL)
+
+    def test_pages_are_cached_separately(self):
+        first = self.client.get(TRAIN_URL, {"limit": 2})
+        second = self.client.get(TRAIN_URL, {"limit": 2, "offset": 2})
+
+        self.assertEqual(
+            [train["name"] for train in first.data["results"]],
+            ["Train 0", "Train 1"],
+        )
+        self.assertEqual(
+            [train["name"] for train in second.data["results"]], ["Train 2"]
+        )
+
+    def test_invalidated_by_changes(self):
+        changes = (
+            lambda: self.trains[0].crew.remove(self.crew[0]),
+            lambda: self.crew[1].save(),
+            lambda: self.trains[1].train_type.save(),
+            lambda: sample_train(name="Train 3"),
+        )
+        for change in changes:
+            self.client.get(TRAIN_URL)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+
+            # Versions, then the page, its count and its crew
+            with self.assertNumQueries(4):
+                self.client.get(TRAIN_URL)
+
+
+class TrainImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        caches["train_list"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser(
+                "admin@myproject.com", "password"
+            )
+        )
+        self.train = sample_train()
+
+    def upload(self, image, image_format="JPEG"):
+        upload = BytesIO()
+        image.save(upload, format=image_format)
+        upload.name = f"train.{image_format.lower()}"
+        upload.seek(0)
+        self.client.post(
+            image_upload_url(self.train.id),
+            {"image": upload},
+            format="multipart",
+        )
+        self.train.refresh_from_db()
+
+    def get_generated(self, size, image_format):
+        """Response for the derivative once the pool has stored it"""
+        url = reverse(
+            "journey:train-image",
+            args=[size, self.train.image.name, image_format],
+        )
+        APIClient().get(url)
+        generate_derivative(self.train.image.name, size, image_format).result()
+
+        return APIClient().get(url)
+
+    def test_derivative_urls(self):
+        self.upload(Image.new("RGB", (20, 10)))
+
+        res = self.client.get(detail_url(self.train.id))
+
+        self.assertEqual(
+            res.data["images"]["thumbnail"]["webp"],
+            "http://testserver/api/station/image/thumbnail/"
+            f"{self.train.image.name}.webp",
+        )
+        self.assertEqual(
+            set(res.data["images"]["medium"]), {"webp", "jpeg"}
+        )
+        res = self.client.get(TRAIN_URL)
+        self.assertEqual(
+            res.data["results"][0]["images"]["thumbnail"]["webp"],
+            "http://testserver/api/station/image/thumbnail/"
+            f"{self.train.image.name}.webp",
+        )
+
+    def test_derivative_generated_on_first_request(self):
+        self.upload(Image.new("RGB", (2000, 1000), "red"))
+        url = reverse(
+            "journey:train-image",
+            args=["thumbnail", self.train.image.name, "webp"],
+        )
+
+        res = APIClient().get(url)
+
+        # The original is served while the derivative is generated
+        self.assertEqual(res.status_code, status.HTTP_307_TEMPORARY_REDIRECT)
+        self.assertEqual(
+            res["Location"], f"http://testserver{self.train.image.url}"
+        )
+        self.assertEqual(res["Cache-Control"], "no-store")
+
+        generate_derivative(
+            self.train.image.name, "thumbnail", "webp"
+        ).result()
+        res = APIClient().get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "image/webp")
+        self.assertIn("immutable", res["Cache-Control"])
+        with Image.open(BytesIO(b"".join(res.streaming_content))) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (320, 160))
+
+        with self.assertNumQueries(0):
+            res = APIClient().get(url)
+            b"".join(res.streaming_content)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_transparent_image_as_jpeg(self):
+        self.upload(Image.new("RGBA", (40, 40), (0, 0, 0, 0)), "PNG")
+
+        res = self.get_generated("medium", "jpeg")
+
+        with Image.open(BytesIO(b"".join(res.streaming_content))) as image:
+            self.assertEqual(image.mode, "RGB")
+            self.assertEqual(image.size, (40, 40))
+            self.assertEqual(image.getpixel((0, 0)), (255, 255, 255))
+
+    def test_duplicate_of_concurrent_generation_is_removed(self):
+        self.upload(Image.new("RGB", (20, 10)))
+        name = self.train.image.name
+        target = derivative_name(name, "thumbnail", "webp")
+        self.get_generated("thumbnail", "webp")
+
+        # Another process stored it after this one checked, saving
+        # finds the name taken and picks a free one
+        with mock.patch.object(
+            default_storage, "exists", side_effect=[False, True, False]
+        ):
+            build_derivative(name, "thumbnail", "webp")
+
+        directory, _ = os.path.split(target)
+        self.assertEqual(
+            default_storage.listdir(directory)[1],
+            [os.path.basename(target)],
+        )
+
+    def test_replaced_image_derivatives_are_deleted(self):
+        self.upload(Image.new("RGB", (20, 10)))
+        previous = derivative_name(self.train.image.name, "thumbnail", "webp")
+        self.get_generated("thumbnail", "webp")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(Image.new("RGB", (30, 10)))
+
+        self.assertFalse(default_storage.exists(previous))
+        self.assertEqual(
+            self.get_generated("thumbnail", "webp").status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_deleted_train_derivatives_are_deleted(self):
+        self.upload(Image.new("RGB", (20, 10)))
+        name = self.train.image.name
+        self.get_generated("medium", "jpeg")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.train.delete()
+
+        self.assertFalse(
+            default_storage.exists(derivative_name(name, "medium", "jpeg"))
+        )
+
+    def test_unknown_images(self):
+        self.upload(Image.new("RGB", (20, 10)))
+        name = self.train.image.name
+
+        for args in (
+            ["huge", name, "webp"],
+            ["thumbnail", name, "gif"],
+            ["thumbnail", "uploads/trains/missing.jpg", "webp"],
+            ["thumbnail", f"../{name}", "webp"],
+        ):
+            with self.subTest(args=args):
+                res = APIClient().get(
+                    reverse("journey:train-image", args=args)
+                )
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
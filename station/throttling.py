@@ -0,0 +1,19 @@
+from rest_framework import throttling
+
+from station.metrics import THROTTLED_REQUESTS
+
+
+class CountedThrottleMixin:
+    """Counts the requests a throttle rejects"""
+
+    def throttle_failure(self):
+        THROTTLED_REQUESTS.labels(scope=self.scope).inc()
+        return super().throttle_failure()
+
+
+class AnonRateThrottle(CountedThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(CountedThrottleMixin, throttling.UserRateThrottle):
+    pass
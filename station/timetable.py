@@ -0,0 +1,341 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from station.cache import bump_version_on_commit
+from station.models import Journey, Route, Station, Train
+
+BATCH_SIZE = 5000
+
+REQUIRED_FIELDS = (
+    "source",
+    "destination",
+    "train",
+    "departure_time",
+    "arrival_time",
+)
+
+
+class TimetableError(ValueError):
+    pass
+
+
+def read_rows(timetable_file, file_format):
+    """(line number, row dict) pairs of a CSV or JSON Lines file"""
+    if file_format == "csv":
+        reader = csv.DictReader(timetable_file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_num, line in enumerate(timetable_file, start=1):
+        if line.strip():
+            try:
+                yield line_num, json.loads(line)
+            except ValueError as error:
+                yield line_num, TimetableError(f"invalid JSON: {error}")
+
+
+def parse_time(value, field):
+    moment = parse_datetime(str(value or "").strip())
+    if moment is None:
+        raise TimetableError(f"{field} is not a valid datetime")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+
+    return moment
+
+
+def parse_number(value, field, cast):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise TimetableError(f"{field} must be a number")
+
+
+class TimetableLoader:
+    """Imports journeys, creating the stations and routes they need.
+
+    Stations are matched by name, routes by their pair of stations,
+    trains by name and journeys by (route, train, departure time).
+    Rows are processed in batches, each written with a few bulk
+    queries in its own transaction, against lookup maps loaded once.
+    With ``dry_run`` nothing is written and the changes are only
+    reported.
+    """
+
+    def __init__(self, dry_run=False, batch_size=BATCH_SIZE, report=None):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.report = report or (lambda line: None)
+        self.stats = {
+            "rows": 0,
+            "stations_created": 0,
+            "routes_created": 0,
+            "routes_updated": 0,
+            "journeys_created": 0,
+            "journeys_updated": 0,
+            "journeys_unchanged": 0,
+            "errors": 0,
+        }
+
+        self.stations = {}
+        for station in Station.objects.order_by("-id"):
+            self.stations[station.name] = station
+        self.routes = {}
+        for route in Route.objects.select_related(
+            "source", "destination"
+        ).order_by("-id"):
+            self.routes[(route.source.name, route.destination.name)] = route
+        self.trains = {}
+        for train in Train.objects.only("id", "name").order_by("-id"):
+            self.trains[train.name] = train
+
+    def load(self, rows):
+        started = time.perf_counter()
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            self.load_batch(batch)
+            self.stats["rows"] += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["rows_per_second"] = (
+            round(self.stats["rows"] / elapsed) if elapsed else 0
+        )
+
+        return self.stats
+
+    def error(self, line_num, message):
+        self.stats["errors"] += 1
+        self.report(f"! line {line_num}: {message}")
+
+    def get_station(self, row, prefix, new_stations):
+        name = str(row.get(prefix) or "").strip()
+        if not name:
+            raise TimetableError(f"{prefix} is required")
+
+        station = self.stations.get(name)
+        if station is None:
+            if any(
+                row.get(f"{prefix}_{coordinate}") in (None, "")
+                for coordinate in ("latitude", "longitude")
+            ):
+                raise TimetableError(
+                    f"unknown station {name!r} needs {prefix}_latitude "
+                    f"and {prefix}_longitude"
+                )
+            station = Station(
+                name=name,
+                latitude=parse_number(
+                    row[f"{prefix}_latitude"], f"{prefix}_latitude", float
+                ),
+                longitude=parse_number(
+                    row[f"{prefix}_longitude"], f"{prefix}_longitude", float
+                ),
+            )
+            self.stations[name] = station
+            new_stations.append(station)
+            self.report(f"+ station {name}")
+
+        return station
+
+    def parse_batch(self, batch):
+        """Valid rows of a batch with their stations resolved"""
+        parsed = []
+        new_stations = []
+        for line_num, row in batch:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                missing = [
+                    field for field in REQUIRED_FIELDS if not row.get(field)
+                ]
+                if missing:
+                    raise TimetableError(f"missing {', '.join(missing)}")
+
+                train = self.trains.get(str(row["train"]).strip())
+                if train is None:
+                    raise TimetableError(f"unknown train {row['train']!r}")
+                departure_time = parse_time(
+                    row["departure_time"], "departure_time"
+                )
+                arrival_time = parse_time(row["arrival_time"], "arrival_time")
+                if arrival_time <= departure_time:
+                    raise TimetableError(
+                        "arrival_time must be after departure_time"
+                    )
+                distance = None
+                if row.get("distance") not in (None, ""):
+                    distance = parse_number(row["distance"], "distance", int)
+
+                source = self.get_station(row, "source", new_stations)
+                destination = self.get_station(
+                    row, "destination", new_stations
+                )
+                if source is destination:
+                    raise TimetableError("source and destination must differ")
+            except TimetableError as error:
+                self.error(line_num, error)
+                continue
+
+            parsed.append(
+                (
+                    line_num,
+                    source,
+                    destination,
+                    distance,
+                    train,
+                    departure_time,
+                    arrival_time,
+                )
+            )
+
+        return parsed, new_stations
+
+    def resolve_routes(self, parsed):
+        """Routes of the parsed rows, split into new and changed ones"""
+        new_routes = []
+        changed_routes = {}
+        rows = []
+        for (
+            line_num,
+            source,
+            destination,
+            distance,
+            train,
+            departure_time,
+            arrival_time,
+        ) in parsed:
+            key = (source.name, destination.name)
+            route = self.routes.get(key)
+            if route is None:
+                if distance is None:
+                    self.error(
+                        line_num,
+                        f"new route {source.name} -> {destination.name} "
+                        f"needs a distance",
+                    )
+                    continue
+                route = Route(
+                    source=source, destination=destination, distance=distance
+                )
+                self.routes[key] = route
+                new_routes.append(route)
+                self.report(
+                    f"+ route {source.name} -> {destination.name} "
+                    f"({distance} km)"
+                )
+            elif distance is not None and route.distance != distance:
+                self.report(
+                    f"~ route {source.name} -> {destination.name} "
+                    f"distance {route.distance} -> {distance}"
+                )
+                route.distance = distance
+                if route.pk:
+                    changed_routes[route.pk] = route
+
+            rows.append((route, train, departure_time, arrival_time))
+
+        return rows, new_routes, list(changed_routes.values())
+
+    def existing_journeys(self, rows):
+        """(id, arrival time) of stored journeys by their natural key"""
+        routes = {route.pk: route for route, *_ in rows if route.pk}
+        if not routes:
+            return {}
+
+        # Probing the departure times alone keeps this one index lookup
+        # per row; a route filter would multiply the probes
+        journeys = Journey.objects.filter(
+            departure_time__in={
+                departure_time for _, _, departure_time, _ in rows
+            },
+        ).values_list(
+            "id", "route_id", "train_id", "departure_time", "arrival_time"
+        )
+
+        return {
+            (
+                routes[route_id].source.name,
+                routes[route_id].destination.name,
+                train_id,
+                departure_time,
+            ): (journey_id, arrival_time)
+            for (
+                journey_id,
+                route_id,
+                train_id,
+                departure_time,
+                arrival_time,
+            ) in journeys.order_by()
+            if route_id in routes
+        }
+
+    def load_batch(self, batch):
+        parsed, new_stations = self.parse_batch(batch)
+        rows, new_routes, changed_routes = self.resolve_routes(parsed)
+        existing = self.existing_journeys(rows)
+
+        new_journeys = {}
+        changed_journeys = {}
+        for route, train, departure_time, arrival_time in rows:
+            key = (
+                route.source.name,
+                route.destination.name,
+                train.pk,
+                departure_time,
+            )
+            if key in new_journeys:
+                new_journeys[key].arrival_time = arrival_time
+                continue
+            if key not in existing:
+                new_journeys[key] = Journey(
+                    route=route,
+                    train=train,
+                    departure_time=departure_time,
+                    arrival_time=arrival_time,
+                )
+                self.report(
+                    f"+ journey {route.source.name} -> "
+                    f"{route.destination.name} {train.name} "
+                    f"{departure_time.isoformat()}"
+                )
+                continue
+
+            journey_id, stored_arrival_time = existing[key]
+            if stored_arrival_time == arrival_time:
+                self.stats["journeys_unchanged"] += 1
+                continue
+
+            self.report(
+                f"~ journey {journey_id} arrival "
+                f"{stored_arrival_time.isoformat()} -> "
+                f"{arrival_time.isoformat()}"
+            )
+            existing[key] = (journey_id, arrival_time)
+            changed_journeys[journey_id] = Journey(
+                id=journey_id, arrival_time=arrival_time
+            )
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Station.objects.bulk_create(new_stations)
+                Route.objects.bulk_create(new_routes)
+                Route.objects.bulk_update(changed_routes, ["distance"])
+                Journey.objects.bulk_create(new_journeys.values())
+                Journey.objects.bulk_update(
+                    changed_journeys.values(), ["arrival_time"]
+                )
+                bump_version_on_commit("station", "route", "journey")
+
+        self.stats["stations_created"] += len(new_stations)
+        self.stats["routes_created"] += len(new_routes)
+        self.stats["routes_updated"] += len(changed_routes)
+        self.stats["journeys_created"] += len(new_journeys)
+        self.stats["journeys_updated"] += len(changed_journeys)
@@ -1,5 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
+
+from station import async_views, health, images
 from station.views import (
     CrewViewSet,
     StationViewSet,
@@ -8,6 +10,7 @@ from station.views import (
     TrainViewSet,
     OrderViewSet,
     JourneyViewSet,
+    JourneyScheduleViewSet,
     TicketViewSet,
 )
 
@@ -19,7 +22,43 @@ router.register("train_type", TrainTypeViewSet, basename="train_type")
 router.register("train", TrainViewSet, basename="train")
 router.register("order", OrderViewSet, basename="order")
 router.register("journey", JourneyViewSet, basename="journey")
+router.register(
+    "journey_schedule", JourneyScheduleViewSet, basename="journey_schedule"
+)
 router.register("ticket", TicketViewSet, basename="ticket")
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("health/db/", health.database_health, name="database-health"),
+    path(
+        "image/<str:size>/<path:name>.<str:image_format>",
+        images.train_image,
+        name="train-image",
+    ),
+    path(
+        "async/journey/",
+        async_views.journey_list,
+        name="async-journey-list",
+    ),
+    path(
+        "async/journey/<int:pk>/",
+        async_views.journey_detail,
+        name="async-journey-detail",
+    ),
+    path(
+        "async/journey/<int:pk>/availability/",
+        async_views.journey_availability,
+        name="async-journey-availability",
+    ),
+    path(
+        "async/journey/<int:pk>/seat-events/",
+        async_views.journey_seat_events,
+        name="async-journey-seat-events",
+    ),
+    path(
+        "async/station/",
+        async_views.station_list,
+        name="async-station-list",
+    ),
+]
 
 app_name = "journey"
@@ -1,12 +1,49 @@
-from django.db.models import Count, F
+from datetime import datetime, time, timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from station import metrics
+from station.cache import versioned_key
+from station.exports import (
+    CONTENT_TYPES,
+    achunks,
+    chunks,
+    date_range_filters,
+    export_lines,
+)
+from station.geo import get_station_index
+from station.db_router import pin_to_primary
+from station.encoders import JOURNEY_LIST_ENCODER, TRAIN_LIST_ENCODER
+from station.mixins import (
+    ConditionalGetMixin,
+    FastListMixin,
+    ReplicaReadMixin,
+)
+from station.pagination import (
+    JourneyPagination,
+    OrderPagination,
+    TicketPagination,
+)
 from station.permissions import IsAdminOrIfAuthenticatedReadOnly
+from station.routing import get_connection_index, to_timestamp
+from station.schedules import (
+    ensure_journeys,
+    get_horizon,
+    get_scheduled_journey,
+)
 
 
 from station.models import (
@@ -17,12 +54,15 @@ from station.models import (
     Train,
     Order,
     Journey,
+    JourneySchedule,
     Ticket,
 )
 
 from station.serializers import (
     CrewSerializer,
     StationSerializer,
+    NearbyStationSearchSerializer,
+    NearbyStationSerializer,
     RouteSerializer,
     TrainTypeSerializer,
     TrainSerializer,
@@ -30,28 +70,90 @@ from station.serializers import (
     JourneySerializer,
     TicketSerializer,
     JourneyListSerializer,
+    JourneySearchSerializer,
+    ConnectionSearchSerializer,
+    ConnectionSerializer,
     TrainListSerializer,
     TrainRetrieveSerializer,
     RouteListSerializer,
     RouteRetrieveSerializer,
     JourneyRetrieveSerializer,
     OrderListSerializer,
+    OrderExportSerializer,
     TrainImageSerializer,
+    JourneyScheduleSerializer,
+    ScheduledJourneySerializer,
 )
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    cache_resources = ("crew",)
 
 
-class StationViewSet(viewsets.ModelViewSet):
+class StationViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
+    cache_resources = ("station",)
 
-
-class RouteViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "latitude",
+                type=float,
+                required=True,
+                description="Latitude of the point",
+            ),
+            OpenApiParameter(
+                "longitude",
+                type=float,
+                required=True,
+                description="Longitude of the point",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=int,
+                description="Number of nearest stations (1-50)",
+            ),
+            OpenApiParameter(
+                "radius",
+                type=float,
+                description="Return all stations within radius km instead",
+            ),
+        ],
+        responses=NearbyStationSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="nearby")
+    def nearby(self, request):
+        """Endpoint for finding the stations closest to a coordinate"""
+        params = NearbyStationSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        index = get_station_index()
+        if "radius" in params:
+            stations = index.within(
+                params["latitude"], params["longitude"], params["radius"]
+            )
+        else:
+            stations = index.nearest(
+                params["latitude"], params["longitude"], params["limit"]
+            )
+
+        serializer = NearbyStationSerializer(stations, many=True)
+        return Response(serializer.data)
+
+
+class RouteViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Route.objects.select_related("source", "destination")
+    cache_resources = ("route", "station")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -71,14 +173,24 @@ class RouteViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class TrainTypeViewSet(viewsets.ModelViewSet):
+class TrainTypeViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
+    cache_resources = ("train_type",)
 
 
-class TrainViewSet(viewsets.ModelViewSet):
+class TrainViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Train.objects.prefetch_related("crew")
     http_method_names = ["get", "post", "patch"]
+    cache_resources = ("train", "crew", "train_type")
+    row_encoder = TRAIN_LIST_ENCODER
 
     @staticmethod
     def _params_to_ints(qs):
@@ -110,12 +222,77 @@ class TrainViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(train_type_id__in=train_type)
 
         if self.action == "list":
-            queryset = queryset.prefetch_related("crew")
+            queryset = (
+                queryset.select_related("train_type")
+                .prefetch_related(None)
+                .prefetch_related(
+                    Prefetch("crew", queryset=Crew.objects.order_by("id"))
+                )
+                .order_by("id")
+            )
         elif self.action == "retrieve":
             queryset = queryset.prefetch_related("crew")
 
         return queryset.distinct()
 
+    def list_cache_key(self):
+        """Key of the requested page for the normalized filters"""
+        params = self.request.query_params
+        filters = [
+            (name, sorted(set(self._params_to_ints(params[name]))))
+            for name in ("crew", "train_type")
+            if params.get(name)
+        ]
+        page = None
+        if self.paginator is not None:
+            page = (
+                self.paginator.get_limit(self.request),
+                self.paginator.get_offset(self.request),
+            )
+
+        return versioned_key(
+            "train-list",
+            self.cache_resources,
+            # Image URLs are absolute
+            self.request.scheme,
+            self.request.get_host(),
+            # Both paths render the same page, but benchmarks compare them
+            settings.FAST_LIST_SERIALIZERS,
+            filters,
+            page,
+            versions=self.get_resource_versions(),
+        )
+
+    def serialize_page(self, queryset):
+        train_list_cache = caches["train_list"]
+        cache_key = self.list_cache_key()
+        cached = train_list_cache.get(cache_key)
+        metrics.record_cache_lookup("train_list", cached is not None)
+
+        if cached is None:
+            data = super().serialize_page(queryset)
+            cached = {
+                "paginated": self.paginated,
+                "count": getattr(self.paginator, "count", None),
+                "results": data,
+            }
+            train_list_cache.set(
+                cache_key, cached, settings.TRAIN_LIST_CACHE_TIMEOUT
+            )
+        else:
+            # Restores what paginate_queryset() sets, links are built
+            # for this request
+            self.paginated = cached["paginated"]
+            if self.paginated:
+                self.paginator.request = self.request
+                self.paginator.limit = self.paginator.get_limit(self.request)
+                self.paginator.offset = self.paginator.get_offset(
+                    self.request
+                )
+                self.paginator.count = cached["count"]
+
+        return cached["results"]
+
     @action(
         methods=["POST"],
         detail=True,
@@ -151,27 +328,52 @@ class TrainViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class OrderSetPagination(PageNumberPagination):
-    page_size = 5
-    page_size_query_param = "page_size"
-    max_page_size = 100
-
-
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
-    pagination_class = OrderSetPagination
+    pagination_class = OrderPagination
+    permission_classes = (IsAuthenticated,)
+    # Booked orders are neither edited nor cancelled through the API
+    http_method_names = ["get", "post", "head", "options"]
 
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
 
         if self.action == "list":
-            queryset = queryset.prefetch_related("tickets__journey__train")
+            queryset = queryset.only("id", "created_at").prefetch_related(
+                Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.select_related(
+                        "journey__route", "journey__train__train_type"
+                    ).only(
+                        "id",
+                        "cargo",
+                        "seat",
+                        "order_id",
+                        "journey__id",
+                        "journey__departure_time",
+                        "journey__tickets_sold",
+                        "journey__route__id",
+                        "journey__route__distance",
+                        "journey__train__id",
+                        "journey__train__name",
+                        "journey__train__seats",
+                        "journey__train__train_type__id",
+                        "journey__train__train_type__name",
+                    ),
+                )
+            )
 
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save()
+        serializer.save(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        pin_to_primary(response, request.user)
+
+        return response
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -179,12 +381,69 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return OrderSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                enum=["csv", "ndjson"],
+                description="Export format (csv by default)",
+            ),
+            OpenApiParameter(
+                "date_from",
+                type=OpenApiTypes.DATE,
+                description="Earliest order date (inclusive)",
+            ),
+            OpenApiParameter(
+                "date_to",
+                type=OpenApiTypes.DATE,
+                description="Latest order date (inclusive)",
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Endpoint for streaming all orders with their tickets"""
+        params = OrderExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        file_format = params["file_format"]
+        lines = export_lines(
+            file_format, params.get("date_from"), params.get("date_to")
+        )
+        streaming_content = (
+            achunks(lines)
+            if isinstance(request._request, ASGIRequest)
+            else chunks(lines)
+        )
+
+        return StreamingHttpResponse(
+            streaming_content,
+            content_type=CONTENT_TYPES[file_format],
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="orders.{file_format}"'
+                )
+            },
+        )
+
 
-class JourneyViewSet(viewsets.ModelViewSet):
+class JourneyViewSet(
+    ReplicaReadMixin, FastListMixin, viewsets.ModelViewSet
+):
     queryset = Journey.objects.select_related("train", "route")
+    pagination_class = JourneyPagination
+    replica_actions = ("list", "search")
+    row_encoder = JOURNEY_LIST_ENCODER
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "search"):
             return JourneyListSerializer
         elif self.action == "retrieve":
             return JourneyRetrieveSerializer
@@ -194,18 +453,227 @@ class JourneyViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = self.queryset
         if self.action == "list":
-            queryset = (
-                queryset.select_related("train").annotate(
-                    tickets_available=F("train__seats") - Count("ticket")
-                )
-            ).order_by("id")
-            return queryset.select_related("train", "route")
+            queryset = queryset.order_by("id").defer("seat_map")
+            return queryset.select_related("train__train_type", "route")
         elif self.action == "retrieve":
             return queryset.select_related("train", "route")
+        elif self.action == "search":
+            return (
+                queryset.select_related("train__train_type", "route")
+                .defer("seat_map")
+                .order_by("departure_time", "id")
+            )
 
         return queryset
 
+    def filter_search(self, queryset, params):
+        if "source" in params:
+            queryset = queryset.filter(route__source_id=params["source"])
+
+        if "destination" in params:
+            queryset = queryset.filter(
+                route__destination_id=params["destination"]
+            )
+
+        return queryset.filter(
+            **date_range_filters(
+                "departure_time",
+                params.get("date_from"),
+                params.get("date_to"),
+            )
+        )
+
+    @staticmethod
+    def ensure_scheduled_journeys(params):
+        """Creates the scheduled journeys a search may return.
+
+        Only searches for a station create them, for the searched dates.
+        Returns the number of journeys created.
+        """
+        filters = {}
+        if "source" in params:
+            filters["route__source_id"] = params["source"]
+
+        if "destination" in params:
+            filters["route__destination_id"] = params["destination"]
+
+        start = params.get("date_from") or timezone.localdate()
+        return ensure_journeys(
+            start, params.get("date_to") or get_horizon(start), **filters
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=int,
+                description="Filter by source station id",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=int,
+                description="Filter by destination station id",
+            ),
+            OpenApiParameter(
+                "date_from",
+                type=OpenApiTypes.DATE,
+                description="Earliest departure date (inclusive)",
+            ),
+            OpenApiParameter(
+                "date_to",
+                type=OpenApiTypes.DATE,
+                description="Latest departure date (inclusive)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="search")
+    def search(self, request):
+        """Endpoint for searching journeys by stations and departure date"""
+        started = perf_counter()
+        params = JourneySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if self.ensure_scheduled_journeys(params.validated_data):
+            # The replicas may not have the new journeys yet, and the
+            # result is cached for everyone
+            self.read_from_primary()
+
+        cache_key = versioned_key(
+            "journey-search",
+            ("journey", "ticket"),
+            # Page links are absolute
+            request.scheme,
+            request.get_host(),
+            sorted(request.query_params.items()),
+        )
+        data = cache.get(cache_key)
+        cache_result = metrics.record_cache_lookup(
+            "journey_search", data is not None
+        )
+
+        if data is None:
+            queryset = self.filter_search(
+                self.get_queryset(), params.validated_data
+            )
+            data = self.get_paginated_response(
+                self.serialize_page(queryset)
+            ).data
+            cache.set(
+                cache_key, data, settings.JOURNEY_SEARCH_CACHE_TIMEOUT
+            )
+
+        metrics.JOURNEY_SEARCH_SECONDS.labels(cache=cache_result).observe(
+            perf_counter() - started
+        )
+        return Response(data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=int,
+                required=True,
+                description="Departure station id",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=int,
+                required=True,
+                description="Arrival station id",
+            ),
+            OpenApiParameter(
+                "departure",
+                type=OpenApiTypes.DATETIME,
+                description="Earliest departure time (defaults to now)",
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type=int,
+                description="Minimum transfer time in minutes",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=int,
+                description="Maximum number of itineraries (1-10)",
+            ),
+        ],
+        responses=ConnectionSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="connections")
+    def connections(self, request):
+        """Endpoint for planning trips with transfers between journeys"""
+        params = ConnectionSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+        # The index holds upcoming journeys only
+        departure = max(
+            params.get("departure") or timezone.now(), timezone.now()
+        )
+
+        itineraries = get_connection_index().itineraries(
+            source=params["source"],
+            destination=params["destination"],
+            depart_after=to_timestamp(departure),
+            transfer=params["min_transfer"] * 60,
+            limit=params["limit"],
+        )
+
+        journeys = Journey.objects.select_related(
+            "train__train_type", "route"
+        ).in_bulk(
+            {
+                journey_id
+                for itinerary in itineraries
+                for journey_id in itinerary.journey_ids
+            }
+        )
+        itineraries = [
+            itinerary
+            for itinerary in itineraries
+            if all(
+                journey_id in journeys for journey_id in itinerary.journey_ids
+            )
+        ]
+        for itinerary in itineraries:
+            itinerary.journeys = [
+                journeys[journey_id] for journey_id in itinerary.journey_ids
+            ]
+
+        serializer = ConnectionSerializer(itineraries, many=True)
+        return Response(serializer.data)
+
+
+class JourneyScheduleViewSet(viewsets.ModelViewSet):
+    queryset = JourneySchedule.objects.all()
+    serializer_class = JourneyScheduleSerializer
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                required=True,
+                description="Departure date",
+            ),
+        ],
+        responses=JourneySerializer,
+    )
+    @action(methods=["GET"], detail=True, url_path="journey")
+    def journey(self, request, pk=None):
+        """Endpoint for the journey of a schedule on a date, for booking"""
+        schedule = self.get_object()
+        params = ScheduledJourneySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        journey = get_scheduled_journey(
+            schedule, params.validated_data["date"]
+        )
+        if journey is None:
+            raise NotFound("The schedule does not run on this date.")
+
+        return Response(JourneySerializer(journey).data)
+
 
 class TicketViewSet(viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    pagination_class = TicketPagination